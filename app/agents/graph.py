@@ -1,25 +1,37 @@
 import logging
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from app.agents.state import AgentState
 from app.agents.nodes import (
     node_retrieve,
+    anode_retrieve,
     node_assess,
     node_rewrite,
+    anode_rewrite,
     node_retrieve_rewritten,
+    anode_retrieve_rewritten,
     node_answer,
+    anode_answer,
 )
 
 logger = logging.getLogger(__name__)
 
-def build_graph():
+def build_graph(include_answer: bool = True):
+    """
+    include_answer=False stops after retrieval (direct or rewritten), for
+    callers that generate the answer themselves, e.g. the SSE endpoint.
+    """
     g = StateGraph(AgentState)
 
-    g.add_node("retrieve", node_retrieve)
+    # Sync + async implementations: graph.invoke uses the first, graph.ainvoke the second
+    g.add_node("retrieve", RunnableLambda(node_retrieve, afunc=anode_retrieve))
     g.add_node("assess", node_assess)
-    g.add_node("rewrite", node_rewrite)
-    g.add_node("retrieve2", node_retrieve_rewritten)
-    g.add_node("answer", node_answer)
+    g.add_node("rewrite", RunnableLambda(node_rewrite, afunc=anode_rewrite))
+    g.add_node("retrieve2", RunnableLambda(node_retrieve_rewritten, afunc=anode_retrieve_rewritten))
+    if include_answer:
+        g.add_node("answer", RunnableLambda(node_answer, afunc=anode_answer))
+    answer = "answer" if include_answer else END
 
     g.set_entry_point("retrieve")
     g.add_edge("retrieve", "assess")
@@ -28,9 +40,10 @@ def build_graph():
         ok = state.get("_retrieval_ok", False)
         return "answer" if ok else "rewrite"
 
-    g.add_conditional_edges("assess", route, {"answer": "answer", "rewrite": "rewrite"})
+    g.add_conditional_edges("assess", route, {"answer": answer, "rewrite": "rewrite"})
     g.add_edge("rewrite", "retrieve2")
-    g.add_edge("retrieve2", "answer")
-    g.add_edge("answer", END)
+    g.add_edge("retrieve2", answer)
+    if include_answer:
+        g.add_edge("answer", END)
 
-    return g.compile()
\ No newline at end of file
+    return g.compile()
@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional
 from copy import deepcopy
 
 from app.llm.client import get_chat_model
+from app.llm.cache import ainvoke_cached, invoke_cached
 
 logger = logging.getLogger(__name__)
 
@@ -43,9 +44,8 @@ def _extract_token_usage(result) -> Optional[dict]:
     return None
 
 
-def node_critic(state: Dict[str, Any]) -> Dict[str, Any]:
-    start, stats = _with_timing(state, "critic")
-
+def _precheck(state: Dict[str, Any], stats: dict, start: float) -> Optional[Dict[str, Any]]:
+    """Rule-based verdicts that need no LLM call; None means ask the critic."""
     answer = (state.get("answer") or "").strip()
     citations = state.get("citations") or []
 
@@ -59,8 +59,13 @@ def node_critic(state: Dict[str, Any]) -> Dict[str, Any]:
         stats = _finish_timing(stats, "critic", start)
         return {"done": False, "critique": "Missing citations; retry with rewrite.", "stats": stats}
 
-    llm = get_chat_model()
-    prompt = [
+    return None
+
+
+def _critic_prompt(state: Dict[str, Any]) -> list:
+    answer = (state.get("answer") or "").strip()
+    citations = state.get("citations") or []
+    return [
         {
             "role": "system",
             "content": (
@@ -75,7 +80,8 @@ def node_critic(state: Dict[str, Any]) -> Dict[str, Any]:
         },
     ]
 
-    result = llm.invoke(prompt)
+
+def _judged(result, stats: dict, start: float) -> Dict[str, Any]:
     verdict = result.content.strip().upper()
 
     usage = _extract_token_usage(result)
@@ -88,4 +94,30 @@ def node_critic(state: Dict[str, Any]) -> Dict[str, Any]:
     stats = _finish_timing(stats, "critic", start)
     logger.info("multi_critic", extra={"verdict": verdict})
 
-    return {"done": done, "critique": critique, "stats": stats}
\ No newline at end of file
+    return {"done": done, "critique": critique, "stats": stats}
+
+
+def node_critic(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "critic")
+
+    early = _precheck(state, stats, start)
+    if early is not None:
+        return early
+
+    llm = get_chat_model("critic")
+    result = invoke_cached(llm, _critic_prompt(state), "critic")
+
+    return _judged(result, stats, start)
+
+
+async def anode_critic(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "critic")
+
+    early = _precheck(state, stats, start)
+    if early is not None:
+        return early
+
+    llm = get_chat_model("critic")
+    result = await ainvoke_cached(llm, _critic_prompt(state), "critic")
+
+    return _judged(result, stats, start)
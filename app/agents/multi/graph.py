@@ -1,10 +1,11 @@
 from typing import Dict, Any
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from app.agents.multi.state import MultiAgentState
-from app.agents.multi.planner import node_plan
-from app.agents.multi.worker import node_work
-from app.agents.multi.critic import node_critic
+from app.agents.multi.planner import node_plan, anode_plan
+from app.agents.multi.worker import node_work, anode_work
+from app.agents.multi.critic import node_critic, anode_critic
 
 
 MAX_ATTEMPTS = 2  # initial + 1 retry
@@ -22,9 +23,9 @@ def _route_after_critic(state: Dict[str, Any]) -> str:
 def build_multi_agent_graph():
     g = StateGraph(MultiAgentState)
 
-    g.add_node("plan", node_plan)
-    g.add_node("work", node_work)
-    g.add_node("critic", node_critic)
+    g.add_node("plan", RunnableLambda(node_plan, afunc=anode_plan))
+    g.add_node("work", RunnableLambda(node_work, afunc=anode_work))
+    g.add_node("critic", RunnableLambda(node_critic, afunc=anode_critic))
 
     g.set_entry_point("plan")
     g.add_edge("plan", "work")
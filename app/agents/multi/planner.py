@@ -7,6 +7,7 @@ from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field, ValidationError
 
 from app.llm.client import get_chat_model
+from app.llm.cache import ainvoke_cached, invoke_cached
 
 logger = logging.getLogger(__name__)
 
@@ -97,15 +98,10 @@ def _parse_plan_json(text: str) -> List[str]:
 
 # ---------- Node ----------
 
-def node_plan(state: Dict[str, Any]) -> Dict[str, Any]:
-    start, stats = _with_timing(state, "plan")
-
-    llm = get_chat_model()
-    q = state["question"]
-
+def _plan_prompt(question: str) -> List[Dict[str, str]]:
     schema_json = PlanModel.model_json_schema()
 
-    prompt = [
+    return [
         {
             "role": "system",
             "content": (
@@ -120,10 +116,11 @@ def node_plan(state: Dict[str, Any]) -> Dict[str, Any]:
                 '{"steps":["Retrieve relevant docs","Answer with citations","Verify grounding"]}'
             ),
         },
-        {"role": "user", "content": q},
+        {"role": "user", "content": question},
     ]
 
-    result = llm.invoke(prompt)
+
+def _planned(result, stats: dict, start: float) -> Dict[str, Any]:
     plan = _parse_plan_json(result.content)
 
     usage = _extract_token_usage(result)
@@ -133,4 +130,22 @@ def node_plan(state: Dict[str, Any]) -> Dict[str, Any]:
     stats = _finish_timing(stats, "plan", start)
     logger.info("multi_plan", extra={"steps": len(plan)})
 
-    return {"plan": plan, "current_step": 0, "attempts": 0, "stats": stats}
\ No newline at end of file
+    return {"plan": plan, "current_step": 0, "attempts": 0, "stats": stats}
+
+
+def node_plan(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "plan")
+
+    llm = get_chat_model("planner")
+    result = invoke_cached(llm, _plan_prompt(state["question"]), "plan")
+
+    return _planned(result, stats, start)
+
+
+async def anode_plan(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "plan")
+
+    llm = get_chat_model("planner")
+    result = await ainvoke_cached(llm, _plan_prompt(state["question"]), "plan")
+
+    return _planned(result, stats, start)
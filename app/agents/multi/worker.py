@@ -1,4 +1,5 @@
 from __future__ import annotations
+import asyncio
 import logging
 import time
 from typing import Dict, Any, Optional
@@ -38,19 +39,7 @@ def _finish_timing(stats: dict, step: str, start: float) -> dict:
     return stats
 
 
-def node_work(state: Dict[str, Any]) -> Dict[str, Any]:
-    start, stats = _with_timing(state, "work")
-    attempts = int(state.get("attempts", 0)) + 1
-
-    session_id = state.get("session_id", "default-session")
-    user_id = state.get("user_id", "default-user")
-
-    top_k = clamp_top_k(int(state.get("top_k", 4) or 4), max_k=4)
-
-    # Memory retrieval (short-term local, long-term via MCP tool)
-    short_mem = load_short_term(session_id)
-    long_mem = mcp_tools.memory_search(user_id, state["question"], top_k=3)
-
+def _rag_input(state: Dict[str, Any], short_mem, long_mem, top_k: int, stats: dict):
     stats.setdefault("memory", {})
     stats["memory"]["short_count"] = len(short_mem) if isinstance(short_mem, list) else 0
     stats["memory"]["long_count"] = len(long_mem) if isinstance(long_mem, list) else 0
@@ -90,9 +79,10 @@ def node_work(state: Dict[str, Any]) -> Dict[str, Any]:
         "path": "direct",
         "stats": {"steps": [], "latency_ms": {}, "tokens": {}},
     }
+    return init_state, memory_lines
 
-    out = _rag_graph.invoke(init_state)
 
+def _work_result(out: Dict[str, Any], memory_lines: list, top_k: int, attempts: int, stats: dict, start: float) -> Dict[str, Any]:
     # merge rag stats inside multi stats (keep separate namespaces to avoid collisions)
     rag_stats = out.get("stats") or {}
     stats.setdefault("sub", {})
@@ -138,4 +128,44 @@ def node_work(state: Dict[str, Any]) -> Dict[str, Any]:
         "path": out.get("path", "direct"),
         "rewritten_question": out.get("rewritten_question"),
         "stats": stats,
-    }
\ No newline at end of file
+    }
+
+
+def node_work(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "work")
+    attempts = int(state.get("attempts", 0)) + 1
+
+    session_id = state.get("session_id", "default-session")
+    user_id = state.get("user_id", "default-user")
+
+    top_k = clamp_top_k(int(state.get("top_k", 4) or 4), max_k=4)
+
+    # Memory retrieval (short-term local, long-term via MCP tool)
+    short_mem = load_short_term(session_id)
+    long_mem = mcp_tools.memory_search(user_id, state["question"], top_k=3)
+
+    init_state, memory_lines = _rag_input(state, short_mem, long_mem, top_k, stats)
+    out = _rag_graph.invoke(init_state)
+
+    return _work_result(out, memory_lines, top_k, attempts, stats, start)
+
+
+async def anode_work(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "work")
+    attempts = int(state.get("attempts", 0)) + 1
+
+    session_id = state.get("session_id", "default-session")
+    user_id = state.get("user_id", "default-user")
+
+    top_k = clamp_top_k(int(state.get("top_k", 4) or 4), max_k=4)
+
+    # Short-term (SQLite) and long-term (MCP) memory fetched concurrently
+    short_mem, long_mem = await asyncio.gather(
+        asyncio.to_thread(load_short_term, session_id),
+        mcp_tools.amemory_search(user_id, state["question"], top_k=3),
+    )
+
+    init_state, memory_lines = _rag_input(state, short_mem, long_mem, top_k, stats)
+    out = await _rag_graph.ainvoke(init_state)
+
+    return _work_result(out, memory_lines, top_k, attempts, stats, start)
@@ -1,15 +1,16 @@
 import logging
 import time
 from copy import deepcopy
-from typing import Dict, Any, List, Optional, Tuple
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 
-from app.retrieval.vector_store import get_vector_store
-from app.retrieval.retriever import retrieve
+from app.core.resources import get_docs_store
+from app.retrieval.retriever import aretrieve, retrieve
 from app.llm.client import get_chat_model
+from app.llm.cache import ainvoke_cached, invoke_cached
 from app.rag.prompting import build_context, build_messages
+from app.rag.streaming import LLMStream, citations_from_chunks
 
 logger = logging.getLogger(__name__)
-PERSIST_DIR = "data/vector_store"
 
 
 def _init_stats(existing: Optional[dict]) -> dict:
@@ -88,10 +89,16 @@ def _keyword_signal(question: str, chunks: List[Dict[str, Any]]) -> bool:
     return any(t in joined for t in terms)
 
 
+def _retrieved(stats: dict, step: str, start: float, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stats = _finish_timing(stats, step, start)
+    logger.info(f"agent_{step}", extra={"retrieved": len(chunks)})
+    return {"chunks": chunks, "stats": stats}
+
+
 def node_retrieve(state: Dict[str, Any]) -> Dict[str, Any]:
     start, stats = _with_timing(state, "retrieve")
 
-    store = get_vector_store(PERSIST_DIR)
+    store = get_docs_store()
     chunks = retrieve(
         store,
         state["question"],
@@ -99,10 +106,21 @@ def node_retrieve(state: Dict[str, Any]) -> Dict[str, Any]:
         metadata_filter=state.get("metadata_filter"),
     )
 
-    stats = _finish_timing(stats, "retrieve", start)
-    logger.info("agent_retrieve", extra={"retrieved": len(chunks)})
+    return _retrieved(stats, "retrieve", start, chunks)
 
-    return {"chunks": chunks, "stats": stats}
+
+async def anode_retrieve(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "retrieve")
+
+    store = get_docs_store()
+    chunks = await aretrieve(
+        store,
+        state["question"],
+        top_k=state.get("top_k", 4),
+        metadata_filter=state.get("metadata_filter"),
+    )
+
+    return _retrieved(stats, "retrieve", start, chunks)
 
 
 def node_assess(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -117,21 +135,17 @@ def node_assess(state: Dict[str, Any]) -> Dict[str, Any]:
     return {"retrieval_ok": ok, "stats": stats}
 
 
-def node_rewrite(state: Dict[str, Any]) -> Dict[str, Any]:
-    start, stats = _with_timing(state, "rewrite")
-
-    llm = get_chat_model()
-    q = state["question"]
-
-    prompt = [
+def _rewrite_prompt(question: str) -> List[Dict[str, str]]:
+    return [
         {
             "role": "system",
             "content": "Rewrite the question into a short search query for documentation retrieval. Return ONLY the rewritten query.",
         },
-        {"role": "user", "content": q},
+        {"role": "user", "content": question},
     ]
 
-    result = llm.invoke(prompt)
+
+def _rewritten(result, stats: dict, start: float) -> Dict[str, Any]:
     rewritten = result.content.strip().strip('"')
 
     usage = _extract_token_usage(result)
@@ -144,10 +158,28 @@ def node_rewrite(state: Dict[str, Any]) -> Dict[str, Any]:
     return {"rewritten_question": rewritten, "path": "rewrite", "stats": stats}
 
 
+def node_rewrite(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "rewrite")
+
+    llm = get_chat_model("rewriter")
+    result = invoke_cached(llm, _rewrite_prompt(state["question"]), "rewrite")
+
+    return _rewritten(result, stats, start)
+
+
+async def anode_rewrite(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "rewrite")
+
+    llm = get_chat_model("rewriter")
+    result = await ainvoke_cached(llm, _rewrite_prompt(state["question"]), "rewrite")
+
+    return _rewritten(result, stats, start)
+
+
 def node_retrieve_rewritten(state: Dict[str, Any]) -> Dict[str, Any]:
     start, stats = _with_timing(state, "retrieve2")
 
-    store = get_vector_store(PERSIST_DIR)
+    store = get_docs_store()
     q2 = state.get("rewritten_question") or state["question"]
 
     chunks = retrieve(
@@ -157,30 +189,35 @@ def node_retrieve_rewritten(state: Dict[str, Any]) -> Dict[str, Any]:
         metadata_filter=state.get("metadata_filter"),
     )
 
-    stats = _finish_timing(stats, "retrieve2", start)
-    logger.info("agent_retrieve2", extra={"retrieved": len(chunks)})
+    return _retrieved(stats, "retrieve2", start, chunks)
 
-    return {"chunks": chunks, "stats": stats}
 
+async def anode_retrieve_rewritten(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "retrieve2")
 
-def node_answer(state: Dict[str, Any]) -> Dict[str, Any]:
-    start, stats = _with_timing(state, "answer")
+    store = get_docs_store()
+    q2 = state.get("rewritten_question") or state["question"]
 
-    chunks = state.get("chunks", [])
-    if not chunks:
-        stats = _finish_timing(stats, "answer", start)
-        return {
-            "answer": "I don't know based on the provided documents.",
-            "citations": [],
-            "stats": stats,
-        }
+    chunks = await aretrieve(
+        store,
+        q2,
+        top_k=state.get("top_k", 4),
+        metadata_filter=state.get("metadata_filter"),
+    )
+
+    return _retrieved(stats, "retrieve2", start, chunks)
 
-    context = build_context(chunks)
-    messages = build_messages(state["question"], context)
 
-    llm = get_chat_model()
-    result = llm.invoke(messages)
+def _no_chunks_answer(stats: dict, start: float) -> Dict[str, Any]:
+    stats = _finish_timing(stats, "answer", start)
+    return {
+        "answer": "I don't know based on the provided documents.",
+        "citations": [],
+        "stats": stats,
+    }
+
 
+def _answered(result, chunks: List[Dict[str, Any]], stats: dict, start: float) -> Dict[str, Any]:
     usage = _extract_token_usage(result)
     if usage:
         stats["tokens"]["answer"] = usage
@@ -196,4 +233,66 @@ def node_answer(state: Dict[str, Any]) -> Dict[str, Any]:
 
     stats = _finish_timing(stats, "answer", start)
 
-    return {"answer": result.content, "citations": citations, "stats": stats}
\ No newline at end of file
+    return {"answer": result.content, "citations": citations, "stats": stats}
+
+
+def node_answer(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "answer")
+
+    chunks = state.get("chunks", [])
+    if not chunks:
+        return _no_chunks_answer(stats, start)
+
+    context = build_context(chunks)
+    messages = build_messages(state["question"], context)
+
+    llm = get_chat_model("answerer")
+    result = invoke_cached(llm, messages, "answer")
+
+    return _answered(result, chunks, stats, start)
+
+
+async def anode_answer(state: Dict[str, Any]) -> Dict[str, Any]:
+    start, stats = _with_timing(state, "answer")
+
+    chunks = state.get("chunks", [])
+    if not chunks:
+        return _no_chunks_answer(stats, start)
+
+    context = build_context(chunks)
+    messages = build_messages(state["question"], context)
+
+    llm = get_chat_model("answerer")
+    result = await ainvoke_cached(llm, messages, "answer")
+
+    return _answered(result, chunks, stats, start)
+
+
+async def astream_answer(state: Dict[str, Any], t0: float) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming node_answer for SSE: yields ("citations", ...), ("token", ...)
+    and finally ("done", <the state update node_answer would return>).
+    t0 is the request start, for time_to_first_token_ms.
+    """
+    start, stats = _with_timing(state, "answer")
+
+    chunks = state.get("chunks", [])
+    if not chunks:
+        yield "citations", {"citations": [], "retrieved": 0}
+        yield "done", _no_chunks_answer(stats, start)
+        return
+
+    citations = citations_from_chunks(chunks)
+    yield "citations", {"citations": citations, "retrieved": len(chunks)}
+
+    messages = build_messages(state["question"], build_context(chunks))
+    stream = LLMStream(get_chat_model("answerer"), messages)
+    async for text in stream:
+        yield "token", {"text": text}
+
+    if stream.usage:
+        stats["tokens"]["answer"] = stream.usage
+    stats.update(stream.rate_stats(t0))
+    stats = _finish_timing(stats, "answer", start)
+
+    yield "done", {"answer": stream.answer, "citations": citations, "stats": stats}
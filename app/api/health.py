@@ -2,8 +2,19 @@ from fastapi import APIRouter
 import logging
 
 from app.core.errors import AppError
+from app.core.circuit import upstream_stats
+from app.core.hedging import hedge_stats
+from app.core.limiter import limiter_stats
+from app.core.resources import registry, get_embedder_handle
 from app.core.retry import retry_on_transient_failure
 from app.core.retryable import RetryableError
+from app.core.singleflight import singleflight_stats
+from app.llm.cache import get_llm_cache
+from app.llm.client import model_routes
+from app.mcp.client_manager import mcp_client_stats
+from app.memory.service import memory_outbox_stats
+from app.rag.answer_cache import get_answer_cache
+from app.retrieval.cache import get_retrieval_cache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +27,27 @@ _flaky_counter = {"count": 0}
 async def health_check():
     return {"status": "ok"}
 
+@router.get("/stats")
+async def runtime_stats():
+    embedder = get_embedder_handle()
+    llm_cache = get_llm_cache()
+    answer_cache = get_answer_cache()
+    retrieval_cache = get_retrieval_cache()
+    return {
+        "resources": registry.stats(),
+        "models": model_routes(),
+        "embedding_cache": embedder.stats() if hasattr(embedder, "stats") else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "retrieval_cache": retrieval_cache.stats() if retrieval_cache else None,
+        "singleflight": singleflight_stats(),
+        "upstreams": upstream_stats(),
+        "hedging": hedge_stats(),
+        "limiters": limiter_stats(),
+        "mcp": mcp_client_stats(),
+        "memory_outbox": memory_outbox_stats(),
+    }
+
 @router.get("/error")
 async def trigger_app_error():
     raise AppError("This is a controlled AppError", status_code=400)
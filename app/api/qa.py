@@ -1,7 +1,15 @@
-from fastapi import APIRouter
+import json
+import time
+from fastapi import APIRouter, Request
 from pydantic import BaseModel, Field
 
-from app.rag.service import answer_question
+from app.api.sse import sse_error, sse_response
+from app.rag.answer_cache import cached_events, cached_stats, get_answer_cache
+from app.rag.service import aanswer_question, astream_answer_question
+from app.rag.streaming import sse_event
+from app.core.request_stats import begin_request_stats, attach_request_stats
+from app.core.singleflight import get_flight
+from app.ingest.embedding_cache import normalize_text
 
 router = APIRouter()
 
@@ -15,10 +23,66 @@ class QAResponse(BaseModel):
     stats: dict
 
 @router.post("/qa", response_model=QAResponse)
-def qa(req: QARequest):
+async def qa(req: QARequest):
+    begin_request_stats()
+    t0 = time.perf_counter()
     # Enforce semantic chunks (since you built both strategies)
-    return answer_question(
-        question=req.question,
-        top_k=req.top_k,
-        metadata_filter={"chunk_strategy": "semantic"},
-    )
\ No newline at end of file
+    metadata_filter = {"chunk_strategy": "semantic"}
+
+    cache = get_answer_cache("qa")
+    probe = await cache.alookup("qa", req.question, req.top_k, metadata_filter) if cache else None
+    if probe and probe.hit:
+        stats = cached_stats(probe, int((time.perf_counter() - t0) * 1000))
+        attach_request_stats(stats)
+        return {"answer": probe.hit["answer"], "citations": probe.hit["citations"], "stats": stats}
+
+    async def answer():
+        out = await aanswer_question(
+            question=req.question,
+            top_k=req.top_k,
+            metadata_filter=metadata_filter,
+        )
+        if probe:
+            await cache.asave(probe, out["answer"], out["citations"])
+        return out
+
+    # identical questions already in flight share that answer
+    flight_key = (normalize_text(req.question), req.top_k, json.dumps(metadata_filter, sort_keys=True))
+    out = await get_flight("qa").ado(flight_key, answer)
+    attach_request_stats(out["stats"])
+    return out
+
+
+@router.post("/qa/stream")
+async def qa_stream(req: QARequest, request: Request):
+    """SSE: `citations`, then `token` events, then `done` with answer + stats."""
+
+    async def events():
+        begin_request_stats()
+        t0 = time.perf_counter()
+        metadata_filter = {"chunk_strategy": "semantic"}
+        try:
+            cache = get_answer_cache("qa")
+            probe = await cache.alookup("qa", req.question, req.top_k, metadata_filter) if cache else None
+            if probe and probe.hit:
+                for event, data in cached_events(probe, t0):
+                    yield sse_event(event, data)
+                return
+
+            citations = []
+            async for event, data in astream_answer_question(
+                question=req.question,
+                top_k=req.top_k,
+                metadata_filter=metadata_filter,
+            ):
+                if event == "done":
+                    if probe:
+                        await cache.asave(probe, data["answer"], citations)
+                    attach_request_stats(data["stats"])
+                elif event == "citations":
+                    citations = data["citations"]
+                yield sse_event(event, data)
+        except Exception as e:
+            yield sse_error(request, e)
+
+    return sse_response(events())
@@ -1,11 +1,20 @@
+import json
 import time
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel, Field
 
 from app.agents.graph import build_graph
+from app.agents.nodes import astream_answer
+from app.api.sse import sse_error, sse_response
+from app.rag.answer_cache import cached_events, cached_stats, get_answer_cache
+from app.rag.streaming import sse_event
+from app.core.request_stats import begin_request_stats, attach_request_stats
+from app.core.singleflight import get_flight
+from app.ingest.embedding_cache import normalize_text
 
 router = APIRouter()
 graph = build_graph()
+retrieval_graph = build_graph(include_answer=False)
 
 
 class QAAgentRequest(BaseModel):
@@ -14,7 +23,7 @@ class QAAgentRequest(BaseModel):
 
 
 @router.post("/qa-agent")
-def qa_agent(req: QAAgentRequest):
+async def qa_agent(req: QAAgentRequest):
     init_state = {
         "question": req.question,
         "top_k": req.top_k,
@@ -23,13 +32,38 @@ def qa_agent(req: QAAgentRequest):
         "stats": {"steps": [], "latency_ms": {}, "tokens": {}},
     }
 
+    begin_request_stats()
     t0 = time.perf_counter()
-    out = graph.invoke(init_state)
+
+    cache = get_answer_cache("qa-agent")
+    probe = await cache.alookup("qa-agent", req.question, req.top_k, init_state["metadata_filter"]) if cache else None
+    if probe and probe.hit:
+        stats = cached_stats(probe, int((time.perf_counter() - t0) * 1000))
+        attach_request_stats(stats)
+        return {
+            "answer": probe.hit["answer"],
+            "citations": probe.hit["citations"],
+            "path": "cache",
+            "rewritten_question": None,
+            "retrieved": stats["retrieved"],
+            "stats": stats,
+        }
+
+    async def run():
+        out = await graph.ainvoke(init_state)
+        if probe:
+            await cache.asave(probe, out.get("answer", ""), out.get("citations", []))
+        return out
+
+    # identical questions already in flight share that graph run
+    flight_key = (normalize_text(req.question), req.top_k, json.dumps(init_state["metadata_filter"], sort_keys=True))
+    out = await get_flight("qa-agent").ado(flight_key, run)
     total_ms = int((time.perf_counter() - t0) * 1000)
 
     stats = out.get("stats") or {"steps": [], "latency_ms": {}, "tokens": {}}
     stats.setdefault("latency_ms", {})
     stats["latency_ms"]["total"] = total_ms
+    attach_request_stats(stats)
 
     return {
         "answer": out.get("answer", "I don't know."),
@@ -38,4 +72,53 @@ def qa_agent(req: QAAgentRequest):
         "rewritten_question": out.get("rewritten_question"),
         "retrieved": len(out.get("chunks", []) or []),
         "stats": stats,
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/qa-agent/stream")
+async def qa_agent_stream(req: QAAgentRequest, request: Request):
+    """SSE: retrieval (and rewrite) run as a graph, then the answer is streamed."""
+    init_state = {
+        "question": req.question,
+        "top_k": req.top_k,
+        "metadata_filter": {"chunk_strategy": "semantic"},
+        "path": "direct",
+        "stats": {"steps": [], "latency_ms": {}, "tokens": {}},
+    }
+
+    async def events():
+        begin_request_stats()
+        t0 = time.perf_counter()
+        try:
+            cache = get_answer_cache("qa-agent")
+            probe = await cache.alookup("qa-agent", req.question, req.top_k, init_state["metadata_filter"]) if cache else None
+            if probe and probe.hit:
+                for event, data in cached_events(probe, t0):
+                    yield sse_event(event, {**data, "path": "cache"} if event == "done" else data)
+                return
+
+            out = await retrieval_graph.ainvoke(init_state)
+            async for event, data in astream_answer(out, t0):
+                if event != "done":
+                    yield sse_event(event, data)
+                    continue
+
+                if probe:
+                    await cache.asave(probe, data["answer"], data["citations"])
+                stats = data["stats"]
+                stats["latency_ms"]["total"] = int((time.perf_counter() - t0) * 1000)
+                attach_request_stats(stats)
+                yield sse_event(
+                    "done",
+                    {
+                        "answer": data["answer"],
+                        "path": out.get("path", "direct"),
+                        "rewritten_question": out.get("rewritten_question"),
+                        "retrieved": len(out.get("chunks", []) or []),
+                        "stats": stats,
+                    },
+                )
+        except Exception as e:
+            yield sse_error(request, e)
+
+    return sse_response(events())
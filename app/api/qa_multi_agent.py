@@ -1,6 +1,7 @@
 import time
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
+from app.core.request_stats import begin_request_stats, attach_request_stats
 from app.memory.service import remember_turn
 from app.agents.multi.graph import build_multi_agent_graph
 from app.mcp.mcp_client import MCPTools
@@ -18,7 +19,7 @@ class QAMultiRequest(BaseModel):
 
 
 @router.post("/qa-multi")
-def qa_multi(req: QAMultiRequest):
+async def qa_multi(req: QAMultiRequest):
     init_state = {
         "user_id": req.user_id,
         "session_id": req.session_id,
@@ -28,10 +29,11 @@ def qa_multi(req: QAMultiRequest):
         "stats": {"steps": [], "latency_ms": {}, "tokens": {}},
     }
 
+    begin_request_stats()
     t0 = time.perf_counter()
-    out = graph.invoke(init_state)
+    out = await graph.ainvoke(init_state)
     
-    mcp_tools.memory_add(req.user_id, req.session_id, req.question, out.get("answer",""))
+    await mcp_tools.amemory_add(req.user_id, req.session_id, req.question, out.get("answer",""))
     
     #remember_turn(
     #user_id=req.user_id,
@@ -44,6 +46,7 @@ def qa_multi(req: QAMultiRequest):
     stats = out.get("stats") or {"steps": [], "latency_ms": {}, "tokens": {}}
     stats.setdefault("latency_ms", {})
     stats["latency_ms"]["total"] = total_ms
+    attach_request_stats(stats)
 
     return {
         "answer": out.get("answer", "I don't know."),
@@ -0,0 +1,26 @@
+import logging
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.core.errors import AppError
+from app.rag.streaming import sse_event
+
+logger = logging.getLogger(__name__)
+
+
+def sse_error(request: Request, exc: Exception) -> str:
+    # Headers are already sent mid-stream, so errors become a final event
+    # shaped like the JSON error handlers' bodies
+    request_id = getattr(request.state, "request_id", None)
+    if isinstance(exc, AppError):
+        return sse_event("error", {"error": exc.message, "request_id": request_id})
+    logger.exception(f"Unhandled exception in stream | request_id={request_id}")
+    return sse_event("error", {"error": "Internal server error", "request_id": request_id})
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,283 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.errors import CircuitOpenError
+from app.core.request_stats import record
+from app.core.retryable import (
+    LocalRateLimitError,
+    RateLimitError,
+    RetryableError,
+    UpstreamTimeoutError,
+    UpstreamUnavailableError,
+)
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Exception classes (by name, anywhere in the MRO) that mean the request never
+# got a proper answer: openai's connection/timeout errors, httpx transport
+# errors and anyio streams closed under an MCP session
+_TRANSPORT_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "TransportError",
+    "TimeoutException",
+    "ClosedResourceError",
+    "BrokenResourceError",
+}
+
+
+def retry_after_hint(e: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After / retry-after-ms response header, if the error carries one."""
+    hint = getattr(e, "retry_after_s", None)
+    if hint is not None:
+        return float(hint)
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        # HTTP-date form; not worth parsing, fall back to our own backoff
+        pass
+    return None
+
+
+def status_of(e: BaseException) -> Optional[int]:
+    """HTTP status of an upstream error (openai / httpx style), if it has one."""
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def as_retryable(e: BaseException) -> Optional[RetryableError]:
+    """
+    Map an upstream exception to a RetryableError subclass, or None when it
+    is not transient (4xx other than 429, tool/business errors, bugs).
+    """
+    if isinstance(e, RetryableError):
+        return e
+
+    status = status_of(e)
+    names = {c.__name__ for c in type(e).__mro__}
+    if status == 429:
+        err: RetryableError = RateLimitError(str(e))
+    elif status is not None and status >= 500:
+        err = UpstreamUnavailableError(str(e))
+    elif status is not None:
+        return None
+    elif isinstance(e, TimeoutError) or "APITimeoutError" in names or "TimeoutException" in names:
+        err = UpstreamTimeoutError(str(e))
+    elif isinstance(e, ConnectionError) or names & _TRANSPORT_ERRORS:
+        err = UpstreamUnavailableError(str(e))
+    else:
+        return None
+
+    err.retry_after_s = retry_after_hint(e)
+    return err
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive transient failures;
+    open rejects calls immediately for `reset_timeout_s` (or the upstream's
+    Retry-After, if longer); then half_open lets `half_open_max` probe calls
+    through: a success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_s: float = 30.0, half_open_max: int = 1) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max = half_open_max
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_for_s = reset_timeout_s
+        self._probes = 0
+        self._probe_started_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def _refresh(self, now: float) -> None:
+        # caller holds the lock
+        if self._state == "open" and now - self._opened_at >= self._open_for_s:
+            self._state = "half_open"
+            self._probes = 0
+            logger.info(f"circuit_half_open upstream={self.name}")
+
+    def _open(self, now: float, retry_after_s: Optional[float]) -> None:
+        # caller holds the lock
+        self._state = "open"
+        self._opened_at = now
+        self._open_for_s = max(self.reset_timeout_s, retry_after_s or 0.0)
+        self.opened += 1
+        logger.warning(f"circuit_open upstream={self.name} failures={self._failures} for_s={self._open_for_s:.1f}")
+
+    def before(self) -> None:
+        """Admit a call or raise CircuitOpenError without touching the upstream."""
+        now = time.monotonic()
+        with self._lock:
+            self._refresh(now)
+            if self._state == "closed":
+                return
+            if self._state == "half_open":
+                # a probe that never reported back (cancelled) must not wedge the circuit
+                if self._probes < self.half_open_max or now - self._probe_started_at > self.reset_timeout_s:
+                    self._probes += 1
+                    self._probe_started_at = now
+                    return
+                retry_in = self.reset_timeout_s
+            else:
+                retry_in = self._open_for_s - (now - self._opened_at)
+            self.rejected += 1
+        record("upstreams", f"{self.name}_rejected")
+        raise CircuitOpenError(self.name, retry_in)
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                logger.info(f"circuit_closed upstream={self.name}")
+            self._state = "closed"
+            self._failures = 0
+
+    def on_failure(self, retry_after_s: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or (self._state == "closed" and self._failures >= self.failure_threshold):
+                self._open(now, retry_after_s)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """
+    Retries allowed over a sliding window: `ratio` of the calls seen in the
+    window plus `min_per_s` per second, so a brownout can add at most that
+    much extra load instead of multiplying every request by the attempt count.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_s: float = 1.0, window_s: int = 10) -> None:
+        self.ratio = ratio
+        self.min_per_s = min_per_s
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        # [second, calls, retries]
+        self._buckets: Deque[List[int]] = deque()
+        self.exhausted = 0
+
+    def _bucket(self) -> List[int]:
+        # caller holds the lock
+        now = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self.window_s:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+
+    def _available(self) -> float:
+        # caller holds the lock
+        calls = sum(b[1] for b in self._buckets)
+        retries = sum(b[2] for b in self._buckets)
+        return self.ratio * calls + self.min_per_s * self.window_s - retries
+
+    def record_call(self) -> None:
+        with self._lock:
+            self._bucket()[1] += 1
+
+    def try_retry(self) -> bool:
+        with self._lock:
+            bucket = self._bucket()
+            if self._available() < 1:
+                self.exhausted += 1
+                return False
+            bucket[2] += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._bucket()
+            return {
+                "calls": sum(b[1] for b in self._buckets),
+                "retries": sum(b[2] for b in self._buckets),
+                "available": round(max(self._available(), 0.0), 1),
+                "exhausted": self.exhausted,
+                "window_s": self.window_s,
+            }
+
+
+class Upstream:
+    """Circuit breaker + retry budget for one upstream service (chat, embeddings, mcp)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout_s=settings.CIRCUIT_RESET_SECONDS,
+            half_open_max=settings.CIRCUIT_HALF_OPEN_MAX_CALLS,
+        )
+        self.budget = RetryBudget(settings.RETRY_BUDGET_RATIO, settings.RETRY_BUDGET_MIN_PER_SECOND)
+
+    def on_error(self, e: BaseException) -> Optional[RetryableError]:
+        """Feed the breaker; returns the retryable form of `e`, or None if it must not be retried."""
+        if isinstance(e, LocalRateLimitError):
+            # shed by our own limiter; says nothing about the upstream's health
+            return e
+        err = as_retryable(e)
+        if err is None:
+            # the upstream answered (e.g. a 400): it is up, whatever we asked it
+            self.breaker.on_success()
+        else:
+            self.breaker.on_failure(getattr(err, "retry_after_s", None))
+        return err
+
+    def allow_retry(self) -> bool:
+        if not self.budget.try_retry():
+            record("upstreams", f"{self.name}_budget_exhausted")
+            return False
+        record("upstreams", f"{self.name}_retries")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"circuit": self.breaker.stats(), "retry_budget": self.budget.stats()}
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = _upstreams[name] = Upstream(name)
+        return upstream
+
+
+def upstream_stats() -> Dict[str, Dict[str, Any]]:
+    with _upstreams_lock:
+        upstreams = list(_upstreams.values())
+    return {u.name: u.stats() for u in upstreams}
@@ -23,4 +23,11 @@ class ForbiddenError(AppError):
 
 class ValidationError(AppError):
     def __init__(self, message: str = "Invalid request"):
-        super().__init__(message, status_code=422)
\ No newline at end of file
+        super().__init__(message, status_code=422)
+
+class CircuitOpenError(AppError):
+    """An upstream's circuit breaker is open: fail fast instead of queueing retries."""
+    def __init__(self, upstream: str, retry_after_s: float):
+        self.upstream = upstream
+        self.retry_after_s = max(retry_after_s, 0.0)
+        super().__init__(f"Upstream '{upstream}' is temporarily unavailable", status_code=503)
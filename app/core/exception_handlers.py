@@ -1,4 +1,5 @@
 import logging
+import math
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from app.core.errors import AppError
@@ -8,12 +9,14 @@ logger = logging.getLogger(__name__)
 
 async def app_error_handler(request: Request, exc: AppError):
     # Business error → safe message
+    retry_after = getattr(exc, "retry_after_s", None)
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.message,
             "request_id": getattr(request.state, "request_id", None),
         },
+        headers={"Retry-After": str(math.ceil(retry_after))} if retry_after is not None else None,
     )
 
 
@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from app.core.request_stats import record
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """
+    Hedged calls for one idempotent call site. If the first attempt hasn't
+    returned after the HEDGE_PERCENTILE latency of recent calls, one more
+    attempt is sent; the first success wins. At most one hedge per call.
+    """
+
+    def __init__(self, name: str, window: int = 256) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.name in _enabled_calls()
+
+    def delay_s(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies_ms)
+        if len(samples) < settings.HEDGE_MIN_SAMPLES:
+            delay_ms = settings.HEDGE_INITIAL_DELAY_MS
+        else:
+            idx = min(int(len(samples) * settings.HEDGE_PERCENTILE / 100), len(samples) - 1)
+            delay_ms = samples[idx]
+        return max(delay_ms, settings.HEDGE_MIN_DELAY_MS) / 1000
+
+    def _observe(self, started: float) -> None:
+        with self._lock:
+            self._latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    def _count(self, hedged: bool = False, won: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self.hedged += hedged
+            self.hedge_wins += won
+        if hedged:
+            record("hedges", f"{self.name}_hedged")
+        if won:
+            record("hedges", f"{self.name}_won")
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Blocking form: both attempts run on the hedge pool, the caller waits for the winner."""
+        if not self.enabled:
+            return fn(*args)
+
+        from app.core.resources import get_hedge_executor
+
+        pool = get_hedge_executor()
+
+        def submit():
+            started = time.perf_counter()
+            # one context copy per attempt: a Context can't be entered by two threads at once
+            fut = pool.submit(contextvars.copy_context().run, fn, *args)
+            return fut, started
+
+        first, first_started = submit()
+        done, _ = wait([first], timeout=self.delay_s())
+        if done:
+            self._count()
+            if first.exception() is None:
+                self._observe(first_started)
+            return first.result()
+
+        second, second_started = submit()
+        started = {first: first_started, second: second_started}
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    self._observe(started[fut])
+                    self._count(hedged=True, won=fut is second)
+                    # the loser can't be interrupted mid-request; its result is dropped
+                    return fut.result()
+                error = error or fut.exception()
+        self._count(hedged=True)
+        raise error
+
+    async def acall(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await factory()
+
+        started: Dict[asyncio.Task, float] = {}
+
+        def launch() -> asyncio.Task:
+            task = asyncio.ensure_future(factory())
+            started[task] = time.perf_counter()
+            return task
+
+        first = launch()
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.delay_s())
+            if done:
+                self._count()
+                if first.exception() is None:
+                    self._observe(started[first])
+                return first.result()
+
+            second = launch()
+            pending = {first, second}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._observe(started[task])
+                        self._count(hedged=True, won=task is second)
+                        return task.result()
+                    error = error or task.exception()
+            self._count(hedged=True)
+            raise error
+        finally:
+            for task in started:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay_ms = round(self.delay_s() * 1000, 1)
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "delay_ms": delay_ms,
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+            }
+
+
+def _enabled_calls() -> set:
+    return {c.strip() for c in settings.HEDGE_CALLS.split(",") if c.strip()}
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_hedge(name: str) -> HedgePolicy:
+    with _policies_lock:
+        policy = _policies.get(name)
+        if policy is None:
+            policy = _policies[name] = HedgePolicy(name)
+        return policy
+
+
+def hedge_stats() -> Dict[str, Dict[str, Any]]:
+    with _policies_lock:
+        policies = list(_policies.values())
+    return {p.name: p.stats() for p in policies}
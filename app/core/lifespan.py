@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .settings import settings
 from .logging import setup_logging
+from .resources import open_resources, aclose_resources
 from dotenv import load_dotenv
 from app.memory.service import ensure_memory_ready
 
@@ -12,5 +13,7 @@ async def lifespan(app: FastAPI):
     setup_logging(settings)
     app.state.settings = settings
     ensure_memory_ready()
+    open_resources()
     yield
-    # Shutdown (we’ll close db clients here later)
\ No newline at end of file
+    # Shutdown
+    await aclose_resources()
@@ -0,0 +1,359 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.circuit import as_retryable, retry_after_hint
+from app.core.request_stats import record
+from app.core.retryable import LocalRateLimitError, RateLimitError
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower goes first; within a class, first come first served
+PRIORITIES = {"live": 0, "background": 1, "eval": 2}
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default="live")
+
+
+@contextmanager
+def use_priority(name: str) -> Iterator[None]:
+    """Run upstream calls made in this context under a priority class (live | background | eval)."""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _TokenBucket:
+    """Per-minute budget refilled continuously; per_minute <= 0 means unlimited."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_s(self, n: float, now: float) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        # a request bigger than the whole budget still goes once the bucket is full
+        need = min(n, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, n: float) -> None:
+        if self.capacity > 0:
+            self.tokens -= n
+
+    def pause(self, seconds: float, now: float) -> None:
+        # upstream said Retry-After: empty the bucket so it takes that long to refill
+        if self.capacity > 0:
+            self._refill(now)
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "event", "loop", "future")
+
+    def __init__(self, priority: int, tokens: float) -> None:
+        self.priority = priority
+        self.tokens = tokens
+        self.event: Optional[threading.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Slot:
+    """
+    One admitted upstream call. Use as a context manager (sync or async);
+    report actual usage with used(tokens) so the TPM budget is corrected.
+    latency_key names the call class (e.g. model + max_tokens) whose latency
+    the call is compared with; None keeps it out of the latency signal.
+    """
+
+    def __init__(
+        self, limiter: "AdaptiveLimiter", tokens: float, priority: Optional[str], latency_key: Optional[str]
+    ) -> None:
+        self.limiter = limiter
+        self.tokens = tokens
+        self.priority = priority or _priority.get()
+        self.latency_key = latency_key
+        self.tokens_used: Optional[int] = None
+        self.wait_ms = 0.0
+        self._started = 0.0
+
+    def used(self, tokens: Optional[int]) -> None:
+        if tokens:
+            self.tokens_used = tokens
+
+    def __enter__(self) -> "Slot":
+        self.wait_ms = self.limiter._acquire(self.tokens, self.priority)
+        self._started = time.perf_counter()
+        return self
+
+    async def __aenter__(self) -> "Slot":
+        self.wait_ms = await self.limiter._aacquire(self.tokens, self.priority)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.limiter._release(self, time.perf_counter() - self._started, exc)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.__exit__(exc_type, exc, tb)
+
+
+class AdaptiveLimiter:
+    """
+    Process-wide admission control for one upstream. A call is admitted
+    when it is the highest-priority waiter, the concurrency window has room
+    and the RPM/TPM buckets cover it. The window adapts AIMD-style: +1 per
+    window of successful calls, halved on a 429. With LIMITER_LATENCY_DECREASE
+    it also shrinks x0.9 when a call class's latency rises above
+    LIMITER_LATENCY_FACTOR x that class's own baseline. Waiting longer than
+    LIMITER_MAX_WAIT_SECONDS raises LocalRateLimitError.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int, max_concurrency: int, min_concurrency: int = 1) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self._lock = threading.Lock()
+        self._rpm = _TokenBucket(rpm)
+        self._tpm = _TokenBucket(tpm)
+        self._window = float(max_concurrency)
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        # latency_key -> [ewma_ms, baseline_ms]; kept per call class, since an
+        # 8-token critic call and a long answer are not comparable
+        self._latency: Dict[str, List[float]] = {}
+
+        self.admitted = 0
+        self.throttled = 0
+        self.shed = 0
+        self.wait_ms_total = 0.0
+
+    # --- admission (caller holds the lock) ---
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        heapq.heappush(self._waiters, (waiter.priority, next(self._seq), waiter))
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        self._waiters = [w for w in self._waiters if w[2] is not waiter]
+        heapq.heapify(self._waiters)
+
+    def _wake_head(self) -> None:
+        if self._waiters:
+            self._waiters[0][2].wake()
+
+    def _try_admit(self, waiter: _Waiter) -> Optional[float]:
+        """None when admitted, else how long to wait before checking again (inf: until woken)."""
+        if self._waiters[0][2] is not waiter or self._in_flight >= int(self._window):
+            return math.inf
+        now = time.monotonic()
+        delay = max(self._rpm.wait_s(1, now), self._tpm.wait_s(waiter.tokens, now))
+        if delay > 0:
+            return delay
+        heapq.heappop(self._waiters)
+        self._rpm.take(1)
+        self._tpm.take(waiter.tokens)
+        self._in_flight += 1
+        self.admitted += 1
+        # the next waiter may fit as well
+        self._wake_head()
+        return None
+
+    def _give_up(self, waiter: _Waiter, waited_s: float) -> LocalRateLimitError:
+        self._dequeue(waiter)
+        self._wake_head()
+        self.shed += 1
+        return LocalRateLimitError(f"{self.name} limiter: no capacity after {waited_s:.1f}s")
+
+    def _admitted(self, started: float, priority: str) -> float:
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.wait_ms_total += wait_ms
+        record("limiter", f"{self.name}_calls")
+        record("limiter", f"{self.name}_wait_ms", wait_ms)
+        if wait_ms > 1000:
+            logger.info(f"limiter_wait upstream={self.name} priority={priority} wait_ms={wait_ms:.0f}")
+        return wait_ms
+
+    def _acquire(self, tokens: float, priority: str) -> float:
+        started = time.perf_counter()
+        if not settings.LIMITER_ENABLED:
+            return 0.0
+        waiter = _Waiter(PRIORITIES[priority], tokens)
+        waiter.event = threading.Event()
+        deadline = started + settings.LIMITER_MAX_WAIT_SECONDS
+        with self._lock:
+            self._enqueue(waiter)
+        while True:
+            with self._lock:
+                delay = self._try_admit(waiter)
+                if delay is None:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise self._give_up(waiter, time.perf_counter() - started)
+                waiter.event.clear()
+            waiter.event.wait(min(delay, remaining))
+        return self._admitted(started, priority)
+
+    async def _aacquire(self, tokens: float, priority: str) -> float:
+        started = time.perf_counter()
+        if not settings.LIMITER_ENABLED:
+            return 0.0
+        waiter = _Waiter(PRIORITIES[priority], tokens)
+        waiter.loop = asyncio.get_running_loop()
+        deadline = started + settings.LIMITER_MAX_WAIT_SECONDS
+        with self._lock:
+            self._enqueue(waiter)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_admit(waiter)
+                    if delay is None:
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise self._give_up(waiter, time.perf_counter() - started)
+                    waiter.future = waiter.loop.create_future()
+                await asyncio.wait({waiter.future}, timeout=min(delay, remaining))
+        except asyncio.CancelledError:
+            with self._lock:
+                self._dequeue(waiter)
+                self._wake_head()
+            raise
+        return self._admitted(started, priority)
+
+    # --- feedback ---
+
+    def _decrease(self, factor: float, now: float) -> None:
+        # caller holds the lock; one cut per second, so a burst of 429s from
+        # calls admitted under the old window doesn't collapse it to the floor
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        old = self._window
+        self._window = max(float(self.min_concurrency), self._window * factor)
+        logger.info(f"limiter_window upstream={self.name} {old:.1f}->{self._window:.1f}")
+
+    def _release(self, slot: Slot, latency_s: float, exc: Optional[BaseException]) -> None:
+        if not settings.LIMITER_ENABLED:
+            return
+        now = time.monotonic()
+        rate_limited = exc is not None and isinstance(as_retryable(exc), RateLimitError)
+        with self._lock:
+            self._in_flight -= 1
+            if slot.tokens_used is not None:
+                # settle the estimate against what the upstream actually billed
+                self._tpm.take(slot.tokens_used - slot.tokens)
+            if rate_limited:
+                self.throttled += 1
+                self._decrease(0.5, now)
+                hint = retry_after_hint(exc)
+                if hint:
+                    self._rpm.pause(hint, now)
+            elif exc is None:
+                slow = slot.latency_key is not None and self._observe_latency(slot.latency_key, latency_s * 1000)
+                if slow and settings.LIMITER_LATENCY_DECREASE:
+                    self._decrease(0.9, now)
+                elif self._window < self.max_concurrency:
+                    self._window = min(float(self.max_concurrency), self._window + 1.0 / self._window)
+            self._wake_head()
+
+    def _observe_latency(self, key: str, ms: float) -> bool:
+        """Update the call class's EWMA and baseline; True when it runs LIMITER_LATENCY_FACTOR x slower."""
+        # caller holds the lock
+        state = self._latency.get(key)
+        if state is None:
+            self._latency[key] = [ms, ms]
+            return False
+        ewma = state[0] = 0.8 * state[0] + 0.2 * ms
+        # the baseline follows drops at once and rises only slowly
+        baseline = state[1] = min(ms, state[1] + 0.01 * (ms - state[1]))
+        # 1ms floor: sub-millisecond baselines (local fakes, cache-like upstreams) are noise
+        return ewma > max(baseline, 1.0) * settings.LIMITER_LATENCY_FACTOR
+
+    def slot(self, tokens: float = 1, priority: Optional[str] = None, latency_key: Optional[str] = None) -> Slot:
+        return Slot(self, tokens, priority, latency_key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            # refill both buckets before reading them
+            self._rpm.wait_s(0, now)
+            self._tpm.wait_s(0, now)
+            queued: Dict[str, int] = {}
+            names = {v: k for k, v in PRIORITIES.items()}
+            for p, _, _ in self._waiters:
+                queued[names[p]] = queued.get(names[p], 0) + 1
+            return {
+                "window": round(self._window, 1),
+                "in_flight": self._in_flight,
+                "queued": queued,
+                "rpm_available": None if self._rpm.capacity <= 0 else int(max(self._rpm.tokens, 0)),
+                "tpm_available": None if self._tpm.capacity <= 0 else int(max(self._tpm.tokens, 0)),
+                "latency_ms": {
+                    key: {"ewma": round(ewma, 1), "baseline": round(baseline, 1)}
+                    for key, (ewma, baseline) in self._latency.items()
+                },
+                "admitted": self.admitted,
+                "throttled": self.throttled,
+                "shed": self.shed,
+                "avg_wait_ms": round(self.wait_ms_total / self.admitted, 1) if self.admitted else 0.0,
+            }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """The limiter for an upstream (chat | embeddings), configured by LIMITER_<NAME>_RPM / _TPM."""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            prefix = f"LIMITER_{name.upper()}_"
+            limiter = _limiters[name] = AdaptiveLimiter(
+                name,
+                rpm=getattr(settings, prefix + "RPM", 0),
+                tpm=getattr(settings, prefix + "TPM", 0),
+                max_concurrency=settings.LIMITER_MAX_CONCURRENCY,
+                min_concurrency=settings.LIMITER_MIN_CONCURRENCY,
+            )
+        return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {l.name: l.stats() for l in limiters}
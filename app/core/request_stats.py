@@ -0,0 +1,38 @@
+import contextvars
+from typing import Any, Dict, Optional
+
+# Per-request counters filled by shared infrastructure (caches, clients) that
+# has no access to the endpoint's `stats` dict. The dict is shared by
+# reference, so contexts copied into worker threads still write to it.
+_current: contextvars.ContextVar[Optional[Dict[str, Dict[str, float]]]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def begin_request_stats() -> Dict[str, Dict[str, float]]:
+    sections: Dict[str, Dict[str, float]] = {}
+    _current.set(sections)
+    return sections
+
+
+def record(section: str, key: str, value: float = 1) -> None:
+    sections = _current.get()
+    if sections is None:
+        return
+    bucket = sections.setdefault(section, {})
+    bucket[key] = bucket.get(key, 0) + value
+
+
+def attach_request_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge the current request's counters into an endpoint `stats` dict.
+    Sections that count hits/misses also get a hit_rate.
+    """
+    sections = _current.get() or {}
+    for name, counters in sections.items():
+        out: Dict[str, Any] = {k: (round(v, 1) if isinstance(v, float) else v) for k, v in counters.items()}
+        if "hits" in out or "misses" in out:
+            total = out.get("hits", 0) + out.get("misses", 0)
+            out["hit_rate"] = round(out.get("hits", 0) / total, 3) if total else 0.0
+        stats[name] = out
+    return stats
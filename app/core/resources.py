@@ -0,0 +1,238 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """
+    Thread-safe registry of long-lived handles (embedders, Chroma stores).
+    Each key is built once per process; concurrent first callers wait on a
+    per-key lock instead of racing to build duplicates.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._handles: Dict[Hashable, Any] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        handle = self._handles.get(key)
+        if handle is not None:
+            with self._lock:
+                self.hits += 1
+            return handle
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                with self._lock:
+                    self.hits += 1
+                return handle
+
+            handle = factory()
+            with self._lock:
+                self._handles[key] = handle
+                self.misses += 1
+            logger.info(f"resource_opened key={key}")
+            return handle
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The handle for `key` if it is already open; never builds one."""
+        return self._handles.get(key)
+
+    def _newest(self) -> Optional[Tuple[Hashable, Any]]:
+        with self._lock:
+            if not self._handles:
+                return None
+            key = next(reversed(self._handles))
+            return key, self._handles[key]
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._handles.pop(key, None)
+            self._key_locks.pop(key, None)
+
+    def close_all(self) -> None:
+        # Newest first, and each handle stays registered until it is closed:
+        # a handle may still use the ones opened before it while closing
+        # (the memory outbox writes through the memory store as it drains).
+        while (item := self._newest()) is not None:
+            key, handle = item
+            try:
+                _close_handle(handle)
+                logger.info(f"resource_closed key={key}")
+            except Exception as e:
+                logger.warning(f"Failed to close resource {key}: {e}")
+            finally:
+                self._forget(key)
+
+    async def aclose_all(self) -> None:
+        """close_all for an event loop: handles with an async aclose() are awaited."""
+        while (item := self._newest()) is not None:
+            key, handle = item
+            try:
+                aclose = getattr(handle, "aclose", None)
+                if callable(aclose):
+                    await aclose()
+                else:
+                    _close_handle(handle)
+                logger.info(f"resource_closed key={key}")
+            except Exception as e:
+                logger.warning(f"Failed to close resource {key}: {e}")
+            finally:
+                self._forget(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "open": [":".join(str(p) for p in k) if isinstance(k, tuple) else str(k) for k in self._handles],
+            }
+
+
+def _close_handle(handle: Any) -> None:
+    close = getattr(handle, "close", None)
+    if callable(close):
+        close()
+        return
+
+    if isinstance(handle, ThreadPoolExecutor):
+        handle.shutdown(wait=False, cancel_futures=True)
+        return
+
+    # langchain_chroma.Chroma keeps the chromadb client on `_client`
+    client = getattr(handle, "_client", None)
+    clear = getattr(client, "clear_system_cache", None)
+    if callable(clear):
+        clear()
+
+
+registry = ResourceRegistry()
+
+
+def get_embedder_handle(model: Optional[str] = None):
+    from app.ingest.embedder import get_cached_embedder
+
+    model = model or settings.EMBEDDING_MODEL
+    return registry.get_or_create(("embedder", model), lambda: get_cached_embedder(model))
+
+
+def get_docs_store(
+    persist_dir: Optional[str] = None,
+    collection: Optional[str] = None,
+    model: Optional[str] = None,
+):
+    from app.retrieval.vector_store import get_vector_store
+
+    persist_dir = persist_dir or settings.VECTOR_PERSIST_DIR
+    collection = collection or settings.DOCS_COLLECTION
+    model = model or settings.EMBEDDING_MODEL
+    return registry.get_or_create(
+        ("docs", persist_dir, collection, model),
+        lambda: get_vector_store(persist_dir, collection, embedding=get_embedder_handle(model)),
+    )
+
+
+def get_memory_store_handle(
+    persist_dir: Optional[str] = None,
+    collection: Optional[str] = None,
+    model: Optional[str] = None,
+):
+    from app.memory.vector import get_memory_store
+
+    persist_dir = persist_dir or settings.VECTOR_PERSIST_DIR
+    collection = collection or settings.MEMORY_COLLECTION
+    model = model or settings.EMBEDDING_MODEL
+    return registry.get_or_create(
+        ("memory", persist_dir, collection, model),
+        lambda: get_memory_store(persist_dir, collection, embedding=get_embedder_handle(model)),
+    )
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """
+    Dedicated pool for blocking vector searches called from async code, so
+    they neither queue behind nor starve the default loop executor.
+    """
+    return registry.get_or_create(
+        ("executor", "vector_search"),
+        lambda: ThreadPoolExecutor(max_workers=settings.VECTOR_SEARCH_WORKERS, thread_name_prefix="vector-search"),
+    )
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """Pool for hedged blocking calls (app.core.hedging); kept apart from the search pool they are made from."""
+    return registry.get_or_create(
+        ("executor", "hedge"),
+        lambda: ThreadPoolExecutor(max_workers=settings.HEDGE_WORKERS, thread_name_prefix="hedge"),
+    )
+
+
+def get_mcp_tool_executor() -> ThreadPoolExecutor:
+    """Pool the MCP tool server's async tools offload their blocking store/SQLite work to."""
+    return registry.get_or_create(
+        ("executor", "mcp_tools"),
+        lambda: ThreadPoolExecutor(max_workers=settings.MCP_TOOL_WORKERS, thread_name_prefix="mcp-tool"),
+    )
+
+
+async def run_on_search_executor(fn: Callable[..., Any], *args: Any) -> Any:
+    """Await a blocking vector-store call on the search pool, in the caller's context (request stats)."""
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(get_search_executor(), call)
+
+
+def get_answer_cache_handle(
+    persist_dir: Optional[str] = None,
+    collection: Optional[str] = None,
+    model: Optional[str] = None,
+):
+    from app.rag.answer_cache import SemanticAnswerCache
+    from app.retrieval.vector_store import get_vector_store
+
+    persist_dir = persist_dir or settings.VECTOR_PERSIST_DIR
+    collection = collection or settings.ANSWER_CACHE_COLLECTION
+    model = model or settings.EMBEDDING_MODEL
+    return registry.get_or_create(
+        ("answer_cache", persist_dir, collection, model),
+        lambda: SemanticAnswerCache(
+            get_vector_store(
+                persist_dir,
+                collection,
+                embedding=get_embedder_handle(model),
+                collection_metadata={"hnsw:space": "cosine"},
+            ),
+            docs_store=get_docs_store(persist_dir, model=model),
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+        ),
+    )
+
+
+def open_resources() -> None:
+    """Open the default handles up front so the first request doesn't pay for them."""
+    get_docs_store()
+    if settings.MEMORY_ENABLED:
+        get_memory_store_handle()
+
+
+def close_resources() -> None:
+    registry.close_all()
+
+
+async def aclose_resources() -> None:
+    await registry.aclose_all()
@@ -1,4 +1,8 @@
+import functools
+import inspect
 import logging
+from typing import Optional, Tuple, Type, Union
+
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -7,25 +11,127 @@ from tenacity import (
     before_sleep_log,
 )
 
+from app.core.circuit import Upstream, get_upstream
 from app.core.settings import settings
-from app.core.retryable import RetryableError
+from app.core.retryable import LocalRateLimitError, RetryableError
 
 logger = logging.getLogger(__name__)
 
 
-def retry_on_transient_failure():
+def _backoff():
+    return wait_exponential(
+        multiplier=settings.RETRY_BASE_DELAY_SECONDS,
+        min=settings.RETRY_BASE_DELAY_SECONDS,
+        max=8,
+    )
+
+
+def _wait_honouring_retry_after(backoff):
+    def wait(retry_state) -> float:
+        hint = getattr(retry_state.outcome.exception(), "retry_after_s", None)
+        return max(backoff(retry_state), hint or 0.0)
+
+    return wait
+
+
+def _may_retry(upstream: Upstream, retry_on):
+    def predicate(retry_state) -> bool:
+        exc = retry_state.outcome.exception()
+        if not isinstance(exc, retry_on) or isinstance(exc, LocalRateLimitError):
+            # a local shed already waited LIMITER_MAX_WAIT_SECONDS; don't queue again
+            return False
+        # checked here, before spending budget on an attempt stop_after_attempt would refuse
+        if retry_state.attempt_number >= settings.RETRY_MAX_ATTEMPTS:
+            return False
+        hint = getattr(exc, "retry_after_s", None)
+        if hint is not None and hint > settings.RETRY_AFTER_MAX_SECONDS:
+            # not worth holding the request that long; the breaker keeps the hint
+            return False
+        return upstream.allow_retry()
+
+    return predicate
+
+
+def _guard(upstream: Upstream, fn):
+    """One attempt: pass the breaker, report the outcome, surface transient errors as RetryableError."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def attempt(*args, **kwargs):
+            upstream.breaker.before()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                err = upstream.on_error(e)
+                if err is None or err is e:
+                    raise
+                raise err from e
+            upstream.breaker.on_success()
+            return result
+    else:
+        @functools.wraps(fn)
+        def attempt(*args, **kwargs):
+            upstream.breaker.before()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                err = upstream.on_error(e)
+                if err is None or err is e:
+                    raise
+                raise err from e
+            upstream.breaker.on_success()
+            return result
+
+    return attempt
+
+
+def retry_on_transient_failure(
+    upstream: Optional[str] = None,
+    retry_on: Union[Type[RetryableError], Tuple[Type[RetryableError], ...]] = RetryableError,
+):
     """
     Retry ONLY transient failures (RetryableError).
     Business errors (AppError) and programmer errors should not be retried.
+
+    With `upstream` (chat | embeddings | mcp) the call also goes through that
+    upstream's circuit breaker and retry budget: an open circuit raises
+    CircuitOpenError at once, provider errors (429, 5xx, timeouts, connection
+    errors) are mapped to RetryableError, retries are only made while the
+    budget allows, and waits honour the upstream's Retry-After.
+
+    `retry_on` narrows what is retried, e.g. UpstreamNotConnectedError for
+    calls that are not idempotent once they reached the upstream.
     """
-    return retry(
-        retry=retry_if_exception_type(RetryableError),
-        stop=stop_after_attempt(settings.RETRY_MAX_ATTEMPTS),
-        wait=wait_exponential(
-            multiplier=settings.RETRY_BASE_DELAY_SECONDS,
-            min=settings.RETRY_BASE_DELAY_SECONDS,
-            max=8,
-        ),
-        reraise=True,
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-    )
\ No newline at end of file
+    if upstream is None:
+        return retry(
+            retry=retry_if_exception_type(RetryableError),
+            stop=stop_after_attempt(settings.RETRY_MAX_ATTEMPTS),
+            wait=_backoff(),
+            reraise=True,
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+        )
+
+    guard = get_upstream(upstream)
+
+    def decorator(fn):
+        retrying = retry(
+            retry=_may_retry(guard, retry_on),
+            stop=stop_after_attempt(settings.RETRY_MAX_ATTEMPTS),
+            wait=_wait_honouring_retry_after(_backoff()),
+            reraise=True,
+            before_sleep=before_sleep_log(logger, logging.WARNING),
+        )(_guard(guard, fn))
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def call(*args, **kwargs):
+                guard.budget.record_call()
+                return await retrying(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def call(*args, **kwargs):
+                guard.budget.record_call()
+                return retrying(*args, **kwargs)
+
+        return call
+
+    return decorator
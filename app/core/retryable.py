@@ -7,9 +7,19 @@ class RateLimitError(RetryableError):
     pass
 
 
+class LocalRateLimitError(RateLimitError):
+    """Shed by our own limiter (queued too long) before reaching the upstream."""
+    pass
+
+
 class UpstreamTimeoutError(RetryableError):
     pass
 
 
 class UpstreamUnavailableError(RetryableError):
+    pass
+
+
+class UpstreamNotConnectedError(UpstreamUnavailableError):
+    """No usable connection: the request was never sent, so even a non-idempotent call may be retried."""
     pass
\ No newline at end of file
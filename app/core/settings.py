@@ -20,12 +20,126 @@ class Settings(BaseSettings):
     HTTP_TIMEOUT_SECONDS: float = 15.0
     RETRY_MAX_ATTEMPTS: int = 3
     RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_AFTER_MAX_SECONDS: float = 10.0   # don't wait out a longer Retry-After; fail instead
+    RETRY_BUDGET_RATIO: float = 0.1         # retries per upstream <= 10% of calls (10s window) ...
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0  # ... plus this many per second for low traffic
+    CIRCUIT_FAILURE_THRESHOLD: int = 5      # consecutive transient failures that open a breaker
+    CIRCUIT_RESET_SECONDS: float = 30.0     # open -> half_open
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1    # probe calls let through while half_open
 
     OPENAI_API_KEY: str
+
+    # Vector store / embeddings
+    VECTOR_PERSIST_DIR: str = "data/vector_store"
+    DOCS_COLLECTION: str = "docs"
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_MAX_ENTRIES: int = 4096
+    EMBED_CACHE_DB_PATH: Optional[str] = None  # e.g. data/embedding_cache.sqlite3
+    VECTOR_SEARCH_WORKERS: int = 16  # threads for blocking Chroma searches on the async path
+    COLLECTION_VERSIONS_PATH: str = "data/collection_versions.sqlite3"  # write counters shared across processes
+    COLLECTION_VERSION_TTL_MS: int = 250  # version reads cached this long; other processes' writes show up within it
+    RETRIEVAL_CACHE_ENABLED: bool = True  # retrieve() results, invalidated by collection version
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 2048
+
+    # Semantic answer cache (paraphrased questions -> stored answer)
+    ANSWER_CACHE_ENDPOINTS: str = ""     # opt-in, comma-separated: qa, qa-agent
+    ANSWER_CACHE_COLLECTION: str = "answer_cache"
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # cosine similarity required for a hit
+
+    # Chat models per role (app/llm/client.py); unset MODEL / TIMEOUT fall back to the defaults
+    LLM_DEFAULT_MODEL: str = "gpt-4o-mini"
+    LLM_POOL_MAX_CONNECTIONS: int = 100  # shared httpx pool across all roles
+    LLM_POOL_MAX_KEEPALIVE: int = 20
+    LLM_PLANNER_MODEL: Optional[str] = None
+    LLM_PLANNER_TEMPERATURE: float = 0.0
+    LLM_PLANNER_MAX_TOKENS: Optional[int] = 400      # short JSON plan
+    LLM_PLANNER_TIMEOUT_SECONDS: Optional[float] = 10.0
+    LLM_REWRITER_MODEL: Optional[str] = None
+    LLM_REWRITER_TEMPERATURE: float = 0.0
+    LLM_REWRITER_MAX_TOKENS: Optional[int] = 96      # one search query
+    LLM_REWRITER_TIMEOUT_SECONDS: Optional[float] = 8.0
+    LLM_ANSWERER_MODEL: Optional[str] = None
+    LLM_ANSWERER_TEMPERATURE: float = 0.0
+    LLM_ANSWERER_MAX_TOKENS: Optional[int] = None    # None = model limit
+    LLM_ANSWERER_TIMEOUT_SECONDS: Optional[float] = 30.0
+    LLM_CRITIC_MODEL: Optional[str] = None
+    LLM_CRITIC_TEMPERATURE: float = 0.0
+    LLM_CRITIC_MAX_TOKENS: Optional[int] = 8         # PASS | FAIL
+    LLM_CRITIC_TIMEOUT_SECONDS: Optional[float] = 10.0
+
+    # Upstream limiter (per process): RPM/TPM budgets + AIMD concurrency window, 0 = unlimited
+    LIMITER_ENABLED: bool = True
+    LIMITER_CHAT_RPM: int = 5000
+    LIMITER_CHAT_TPM: int = 2000000
+    LIMITER_EMBEDDINGS_RPM: int = 3000
+    LIMITER_EMBEDDINGS_TPM: int = 1000000
+    LIMITER_MAX_CONCURRENCY: int = 64    # window ceiling; it starts here and shrinks under pressure
+    LIMITER_MIN_CONCURRENCY: int = 2
+    LIMITER_LATENCY_DECREASE: bool = False  # also shrink the window on rising latency; off: 429s only
+    LIMITER_LATENCY_FACTOR: float = 3.0  # per call class: latency EWMA above baseline x this counts as slow
+    LIMITER_MAX_WAIT_SECONDS: float = 30.0  # queued longer than this: LocalRateLimitError
+    LIMITER_DEFAULT_COMPLETION_TOKENS: int = 512  # TPM estimate for roles without max_tokens
+
+    # Hedged requests (idempotent calls only): a second attempt after the HEDGE_PERCENTILE latency
+    HEDGE_CALLS: str = ""             # opt-in, comma-separated: query_embedding, docs_search, memory_search, batch
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_MIN_SAMPLES: int = 20       # below this, wait HEDGE_INITIAL_DELAY_MS
+    HEDGE_INITIAL_DELAY_MS: float = 200.0
+    HEDGE_MIN_DELAY_MS: float = 20.0  # never hedge sooner than this
+    HEDGE_WORKERS: int = 16           # threads for hedged blocking calls
+
+    SINGLEFLIGHT_ENABLED: bool = True  # share one in-flight call among identical concurrent requests
+
+    # LLM response cache (exact match, temperature=0 prompts only)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_STEPS: str = "rewrite,plan,critic"  # comma-separated nodes whose prompts are cached
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_DB_PATH: Optional[str] = "data/llm_cache.sqlite3"  # None = in-memory only
+    LLM_CACHE_TTL_SECONDS: int = 86400
+
+    # Ingestion
+    INGEST_MANIFEST_PATH: str = "data/ingest_manifest.sqlite3"
+    INGEST_JOURNAL_PATH: str = "data/ingest_journal.sqlite3"  # per-run progress, used by --resume
+    LOADER_READ_WORKERS: int = 8         # threads reading files during the walk
+    EMBED_BATCH_MAX_TOKENS: int = 20000  # estimated tokens per embeddings request
+    EMBED_BATCH_MAX_ITEMS: int = 256     # inputs per embeddings request
+    EMBED_WORKERS: int = 4               # concurrent embeddings requests
+    CHUNK_WORKERS: int = 2               # chunking processes (1 = in-process)
+    DEDUP_MODE: str = "reuse"            # off | reuse (share canonical vector) | drop (don't store duplicates)
+    DEDUP_NEAR_THRESHOLD: float = 0.9    # estimated Jaccard for near-duplicates
+    DEDUP_VECTOR_CACHE: int = 5000       # canonical vectors kept for reuse
+    VECTOR_CACHE_DIR: Optional[str] = "data/embedding_cache"  # chunk vectors by (model, sha256); None disables
+    VECTOR_CACHE_MAX_MB: int = 1024
+    INGEST_QUEUE_SIZE: int = 32          # docs buffered between streaming stages
+    INGEST_WRITE_BATCH: int = 512        # records per vector store write
+
+    # MCP client (app/mcp/client_manager.py)
+    MCP_TRANSPORT: str = "http"              # http (MCP_URL) | memory (in-process FastMCP) | direct (call the tool functions)
+    MCP_URL: str = "http://127.0.0.1:8765/mcp"
+    MCP_POOL_SIZE: int = 4                   # long-lived sessions
+    MCP_CALL_TIMEOUT_SECONDS: float = 15.0
+    MCP_CONNECT_TIMEOUT_SECONDS: float = 5.0  # also the wait for a healthy session and the ping timeout
+    MCP_HEALTH_INTERVAL_SECONDS: float = 15.0
+    MCP_BATCH_MAX_CALLS: int = 16            # per `batch` tool call
+    # MCP tool server (mcp/server.py)
+    MCP_SERVER_HOST: str = "127.0.0.1"
+    MCP_SERVER_PORT: int = 8765
+    # one server process (local Chroma dirs can't be shared); this is its concurrency
+    MCP_TOOL_WORKERS: int = 16               # threads for blocking tool work
+
     MEMORY_ENABLED: bool = True
     MEMORY_DB_PATH: str = "data/memory.sqlite3"
     MEMORY_COLLECTION: str = "memories"
     MEMORY_MAX_MESSAGES: int = 8   # short-term window
     MEMORY_TOP_K: int = 4          # long-term recall   
+    MEMORY_WRITE_BEHIND: bool = True          # long-term writes go through the SQLite outbox
+    MEMORY_OUTBOX_MAX_PENDING: int = 2000      # turns; enqueue blocks past this
+    MEMORY_OUTBOX_BLOCK_SECONDS: float = 2.0   # then the caller writes long-term itself
+    MEMORY_OUTBOX_BATCH_TURNS: int = 64        # turns per embedding + add_texts call
+    MEMORY_OUTBOX_FLUSH_MS: int = 200          # longest wait for a partial batch to fill
+    MEMORY_OUTBOX_LEASE_SECONDS: float = 60.0  # a claimed batch is retried after this (worker died)
+    MEMORY_OUTBOX_MAX_ATTEMPTS: int = 5        # then the turn stays in the table as dead
+    MEMORY_OUTBOX_SHUTDOWN_SECONDS: float = 10.0
 
 settings = Settings()
\ No newline at end of file
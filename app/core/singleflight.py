@@ -0,0 +1,129 @@
+import asyncio
+import copy
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.request_stats import record
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+    The first caller (leader) runs the work; callers arriving while it is in
+    flight wait for its result and get a deep copy, so they can mutate it
+    freely. Nothing is cached: once the call finishes the key is released.
+
+    do() is for threads, ado() for coroutines. In ado() the work runs as a
+    task shielded from each waiter, so one client disconnecting doesn't
+    cancel it for the others.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        # key -> [future/task, number of joined callers]
+        self._sync: Dict[Hashable, list] = {}
+        self._async: Dict[Hashable, list] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _joined(self) -> None:
+        with self._lock:
+            self.coalesced += 1
+        record("singleflight", self.name)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return fn()
+
+        with self._lock:
+            entry = self._sync.get(key)
+            leader = entry is None
+            if leader:
+                entry = self._sync[key] = [Future(), 0]
+                self.leaders += 1
+            else:
+                entry[1] += 1
+
+        fut = entry[0]
+        if not leader:
+            self._joined()
+            return copy.deepcopy(fut.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self._sync.pop(key, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._sync.pop(key, None)
+        fut.set_result(result)
+        # followers copy the shared result; the leader only needs its own copy if there are any
+        return copy.deepcopy(result) if entry[1] else result
+
+    async def ado(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await factory()
+
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            entry = self._async.get(loop_key)
+            leader = entry is None
+            if leader:
+                # runs in a copy of the leader's context, so its request stats get the work
+                task = loop.create_task(factory())
+                entry = self._async[loop_key] = [task, 0]
+                task.add_done_callback(lambda t: self._release(loop_key, t))
+                self.leaders += 1
+            else:
+                entry[1] += 1
+
+        result = await asyncio.shield(entry[0])
+        if not leader:
+            self._joined()
+            return copy.deepcopy(result)
+        # _release ran before any waiter resumed, so the join count is final
+        return copy.deepcopy(result) if entry[1] else result
+
+    def _release(self, loop_key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            entry = self._async.get(loop_key)
+            if entry is not None and entry[0] is task:
+                del self._async[loop_key]
+        if not task.cancelled():
+            # mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._sync) + len(self._async),
+            }
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight(name)
+        return flight
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    with _flights_lock:
+        flights = list(_flights.values())
+    return {f.name: f.stats() for f in flights}
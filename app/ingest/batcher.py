@@ -0,0 +1,153 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List
+
+from app.core.circuit import status_of
+
+logger = logging.getLogger(__name__)
+
+# statuses that blame the input (bad or oversize text), so a smaller batch may pass
+_INPUT_ERROR_STATUSES = {400, 413, 422}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars/token for English prose; good enough for request sizing
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class EmbedItem:
+    key: Hashable
+    text: str
+
+
+@dataclass
+class BatchStats:
+    chunks: int = 0
+    requests: int = 0
+    splits: int = 0
+    failed: int = 0
+    cached: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def chunks_per_s(self) -> float:
+        return self.chunks / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def requests_per_s(self) -> float:
+        return self.requests / self.elapsed_s if self.elapsed_s else 0.0
+
+    def merge(self, other: "BatchStats") -> None:
+        self.chunks += other.chunks
+        self.requests += other.requests
+        self.splits += other.splits
+        self.failed += other.failed
+        self.cached += other.cached
+        self.elapsed_s += other.elapsed_s
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "chunks": self.chunks,
+            "requests": self.requests,
+            "splits": self.splits,
+            "failed": self.failed,
+            "cached": self.cached,
+            "elapsed_s": round(self.elapsed_s, 2),
+            "chunks_per_s": round(self.chunks_per_s, 1),
+            "requests_per_s": round(self.requests_per_s, 2),
+        }
+
+
+def pack_batches(items: List[EmbedItem], max_tokens: int, max_items: int) -> List[List[EmbedItem]]:
+    """
+    Greedy packing across documents. An item larger than max_tokens
+    still gets a batch of its own.
+    """
+    batches: List[List[EmbedItem]] = []
+    current: List[EmbedItem] = []
+    current_tokens = 0
+
+    for item in items:
+        n = estimate_tokens(item.text)
+        if current and (current_tokens + n > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += n
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+@dataclass
+class EmbedResult:
+    vectors: Dict[Hashable, List[float]] = field(default_factory=dict)
+    errors: Dict[Hashable, str] = field(default_factory=dict)
+    stats: BatchStats = field(default_factory=BatchStats)
+
+
+class EmbeddingBatcher:
+    """
+    Embeds items from many documents in token/item-bounded batches on a
+    bounded thread pool. A batch rejected for its input is split in half
+    and each half retried, so one bad chunk only fails itself. Any other
+    error (rate limit, open circuit, auth, outage) fails the whole batch at
+    once: splitting would only multiply the calls.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_tokens: int,
+        max_items: int,
+        workers: int,
+    ) -> None:
+        self.embed_fn = embed_fn
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.workers = max(1, workers)
+        self._lock = Lock()
+
+    def _run_batch(self, batch: List[EmbedItem], result: EmbedResult) -> None:
+        with self._lock:
+            result.stats.requests += 1
+        try:
+            vectors = self.embed_fn([i.text for i in batch])
+        except Exception as e:
+            if len(batch) == 1 or status_of(e) not in _INPUT_ERROR_STATUSES:
+                logger.warning(f"Embedding failed for {len(batch)} item(s), first key={batch[0].key}: {e}")
+                with self._lock:
+                    for item in batch:
+                        result.errors[item.key] = str(e)
+                    result.stats.failed += len(batch)
+                return
+            with self._lock:
+                result.stats.splits += 1
+            mid = len(batch) // 2
+            self._run_batch(batch[:mid], result)
+            self._run_batch(batch[mid:], result)
+            return
+
+        with self._lock:
+            for item, vector in zip(batch, vectors):
+                result.vectors[item.key] = vector
+            result.stats.chunks += len(batch)
+
+    def embed(self, items: List[EmbedItem]) -> EmbedResult:
+        result = EmbedResult()
+        batches = pack_batches(items, self.max_tokens, self.max_items)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed") as pool:
+            for f in [pool.submit(self._run_batch, b, result) for b in batches]:
+                f.result()
+        result.stats.elapsed_s = time.perf_counter() - t0
+
+        logger.info(f"Embedded batches={len(batches)} {result.stats.as_dict()}")
+        return result
+
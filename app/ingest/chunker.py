@@ -1,8 +1,37 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Tuple
+
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# (start, end, text) with text == source[start:end]
+Span = Tuple[int, int, str]
 
-def fixed_chunk(text: str, size: int = 1200, overlap: int = 200) -> list[str]:
-    chunks = []
+# One splitter per (size, overlap) per process; pool workers each build their own.
+_SPLITTERS: dict[tuple[int, int], RecursiveCharacterTextSplitter] = {}
+
+# The pool starts on a pipeline thread while the other stages run; forking
+# then can copy a lock another thread holds into the child. Start workers
+# from a clean process instead.
+_MP_START = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    key = (chunk_size, chunk_overlap)
+    splitter = _SPLITTERS.get(key)
+    if splitter is None:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+        _SPLITTERS[key] = splitter
+    return splitter
+
+
+def fixed_chunk_spans(text: str, size: int = 1200, overlap: int = 200) -> list[Span]:
+    spans = []
     start = 0
     n = len(text)
 
@@ -10,23 +39,88 @@ def fixed_chunk(text: str, size: int = 1200, overlap: int = 200) -> list[str]:
         end = min(start + size, n)
         chunk = text[start:end]
         if chunk.strip():
-            chunks.append(chunk)
+            spans.append((start, end, chunk))
         start = end - overlap
         if start < 0:
             start = 0
         if end == n:
             break
 
-    return chunks
+    return spans
+
+
+def fixed_chunk(text: str, size: int = 1200, overlap: int = 200) -> list[str]:
+    return [s[2] for s in fixed_chunk_spans(text, size, overlap)]
+
+
+def semantic_chunk_spans(text: str, chunk_size: int = 1200, chunk_overlap: int = 200) -> list[Span]:
+    """
+    Recursive split tries to respect paragraph/section boundaries.
+    The splitter only returns strings, so offsets are recovered by searching
+    forward from the previous chunk's start (chunks are in order and overlap).
+    """
+    spans = []
+    cursor = 0
+    for chunk in _get_splitter(chunk_size, chunk_overlap).split_text(text):
+        if not chunk.strip():
+            continue
+        start = text.find(chunk, cursor)
+        if start < 0:
+            start = text.find(chunk)
+        if start < 0:
+            # Splitter normalized the text somehow; keep the chunk without a reliable offset
+            spans.append((-1, -1, chunk))
+            continue
+        spans.append((start, start + len(chunk), chunk))
+        cursor = start + 1
+    return spans
+
 
 def semantic_chunk(text: str, chunk_size: int = 1200, chunk_overlap: int = 200) -> list[str]:
     """
     Recursive split tries to respect paragraph/section boundaries.
     Still character-based, but much better than raw slicing.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-    return [c for c in splitter.split_text(text) if c.strip()]
\ No newline at end of file
+    return [s[2] for s in semantic_chunk_spans(text, chunk_size, chunk_overlap)]
+
+
+def chunk_spans(text: str, chunk_strategy: str) -> list[Span]:
+    if chunk_strategy == "fixed":
+        return fixed_chunk_spans(text)
+    if chunk_strategy == "semantic":
+        return semantic_chunk_spans(text)
+    raise ValueError(f"Unknown chunk_strategy: {chunk_strategy}")
+
+
+def _chunk_task(args: Tuple[str, str]) -> list[Span]:
+    text, chunk_strategy = args
+    return chunk_spans(text, chunk_strategy)
+
+
+def iter_chunk_spans(
+    docs: Iterable[dict],
+    chunk_strategy: str,
+    workers: int = 1,
+    max_in_flight: int = 0,
+) -> Iterator[tuple[dict, list[Span]]]:
+    """
+    Chunk docs on a process pool, yielding (doc, spans) in input order.
+    Submissions are capped at max_in_flight (default 4 per worker) so a
+    lazy doc stream is never read ahead unboundedly. workers<=1 runs inline.
+    """
+    if workers <= 1:
+        for doc in docs:
+            yield doc, chunk_spans(doc["text"], chunk_strategy)
+        return
+
+    max_in_flight = max_in_flight or workers * 4
+    in_flight: deque = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(_MP_START)) as pool:
+        for doc in docs:
+            in_flight.append((doc, pool.submit(_chunk_task, (doc["text"], chunk_strategy))))
+            if len(in_flight) >= max_in_flight:
+                head, fut = in_flight.popleft()
+                yield head, fut.result()
+        while in_flight:
+            head, fut = in_flight.popleft()
+            yield head, fut.result()
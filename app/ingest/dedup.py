@@ -0,0 +1,109 @@
+import hashlib
+import random
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_WORD = re.compile(r"\w+")
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(s: str) -> int:
+    # Built-in str hash: salted per process, which is fine for a per-run index
+    return hash(s) & _MASK64
+
+
+def _shingles(text: str, k: int) -> set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < k:
+        return {_hash64(" ".join(words))} if words else set()
+    return {_hash64(" ".join(words[i : i + k])) for i in range(len(words) - k + 1)}
+
+
+@dataclass
+class DedupStats:
+    chunks: int = 0
+    exact: int = 0
+    near: int = 0
+
+    def as_dict(self, mode: str) -> Dict[str, int]:
+        dups = self.exact + self.near
+        return {
+            "chunks": self.chunks,
+            "exact_duplicates": self.exact,
+            "near_duplicates": self.near,
+            "embedding_calls_saved": dups,
+            "index_entries_saved": dups if mode == "drop" else 0,
+        }
+
+
+class ChunkDeduper:
+    """
+    Corpus-wide duplicate detection for one ingestion run: exact matches by
+    hash of whitespace-normalized text, near duplicates by MinHash + LSH
+    banding, confirmed against the estimated Jaccard similarity.
+
+    MinHash uses one 64-bit shingle hash XORed with per-permutation random
+    masks, which keeps signature computation in C-level builtins.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 32, bands: int = 8, shingle_words: int = 3, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_words = shingle_words
+        rnd = random.Random(seed)
+        self._masks = [rnd.getrandbits(64) for _ in range(num_perm)]
+
+        self._exact: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], str] = {}
+        self._signatures: Dict[str, array] = {}
+        self.stats = DedupStats()
+
+    def _signature(self, text: str) -> Optional[array]:
+        hashes = _shingles(text, self.shingle_words)
+        if not hashes:
+            return None
+        return array("Q", (min(map(mask.__xor__, hashes)) & _MASK64 for mask in self._masks))
+
+    def _band_keys(self, sig: array) -> List[Tuple[int, bytes]]:
+        return [(b, sig[b * self.rows : (b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+
+    def _similarity(self, a: array, b: array) -> float:
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+    def check(self, uid: str, text: str) -> Optional[str]:
+        """
+        Returns the canonical uid if `text` duplicates an earlier chunk,
+        otherwise registers `uid` as canonical and returns None.
+        """
+        self.stats.chunks += 1
+
+        exact_key = hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+        canonical = self._exact.get(exact_key)
+        if canonical is not None:
+            self.stats.exact += 1
+            return canonical
+
+        sig = self._signature(text)
+        if sig is not None:
+            keys = self._band_keys(sig)
+            for key in keys:
+                candidate = self._buckets.get(key)
+                if candidate is None or candidate == uid:
+                    continue
+                if self._similarity(sig, self._signatures[candidate]) >= self.threshold:
+                    self.stats.near += 1
+                    return candidate
+
+            self._signatures[uid] = sig
+            for key in keys:
+                # first chunk in a bucket stays its representative
+                self._buckets.setdefault(key, uid)
+
+        self._exact[exact_key] = uid
+        return None
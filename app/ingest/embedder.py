@@ -1,10 +1,65 @@
 import logging
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
+from app.core.hedging import get_hedge
+from app.core.limiter import get_limiter
+from app.core.retry import retry_on_transient_failure
+from app.core.settings import settings
+from app.ingest.batcher import estimate_tokens
+from app.ingest.embedding_cache import CachingEmbedder
+
 logger = logging.getLogger(__name__)
 
 
-def get_embedder():
-    model = "text-embedding-3-small"
+class GuardedEmbeddings(Embeddings):
+    """
+    OpenAI embeddings behind the "embeddings" limiter, circuit breaker and
+    retry budget. The SDK's own retries are off so every retry is accounted
+    for. `priority` pins the limiter class (e.g. "background" for ingestion);
+    None uses the caller's context (live by default).
+    """
+
+    def __init__(self, model: str, priority: Optional[str] = None):
+        self.model = model
+        self.priority = priority
+        self.base = OpenAIEmbeddings(model=model, max_retries=0)
+        self._embed_documents = retry_on_transient_failure("embeddings")(self._limited_documents)
+        self._embed_query = retry_on_transient_failure("embeddings")(self._limited_query)
+
+    def _limited_documents(self, texts: List[str]) -> List[List[float]]:
+        with get_limiter("embeddings").slot(sum(estimate_tokens(t) for t in texts), self.priority, "documents"):
+            return self.base.embed_documents(texts)
+
+    def _limited_query(self, text: str) -> List[float]:
+        with get_limiter("embeddings").slot(estimate_tokens(text), self.priority, "query"):
+            return self.base.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        # tiny and idempotent, and on the /qa critical path: hedged when opted in
+        return get_hedge("query_embedding").call(self._embed_query, text)
+
+
+def get_embedder(model: Optional[str] = None, priority: Optional[str] = None):
+    model = model or settings.EMBEDDING_MODEL
     logger.info(f"Using embedding model: {model}")
-    return OpenAIEmbeddings(model=model)
\ No newline at end of file
+    return GuardedEmbeddings(model, priority)
+
+
+def get_cached_embedder(model: Optional[str] = None):
+    """get_embedder wrapped in the query/document embedding cache (if enabled)."""
+    model = model or settings.EMBEDDING_MODEL
+    base = get_embedder(model)
+    if not settings.EMBED_CACHE_ENABLED:
+        return base
+    return CachingEmbedder(
+        base,
+        model=model,
+        max_entries=settings.EMBED_CACHE_MAX_ENTRIES,
+        db_path=settings.EMBED_CACHE_DB_PATH,
+    )
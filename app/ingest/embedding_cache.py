@@ -0,0 +1,197 @@
+import functools
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.request_stats import record
+from app.core.singleflight import get_flight
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    a = array("f")
+    a.frombytes(blob)
+    return a.tolist()
+
+
+class _SQLiteTier:
+    """Optional on-disk tier so cached embeddings survive restarts."""
+
+    def __init__(self, db_path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return {k: _unpack(v) for k, v in rows}
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = int(time.time())
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(key, model, vector, created_at) VALUES (?, ?, ?, ?)",
+                [(k, model, _pack(v), now) for k, v in items.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingEmbedder(Embeddings):
+    """
+    Wraps an embedder and caches embed_query/embed_documents results.
+    Keys are sha256(model + normalized text); the in-memory tier is a bounded
+    LRU, the optional SQLite tier is consulted on LRU misses.
+    """
+
+    def __init__(self, base: Embeddings, model: str, max_entries: int = 4096, db_path: Optional[str] = None):
+        self.base = base
+        self.model = model
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _SQLiteTier(db_path) if db_path else None
+        self._flight = get_flight("embeddings")
+
+        # moving average of upstream latency per embedded text, used to estimate saved time
+        self._avg_ms: Dict[str, float] = {"query": 0.0, "documents": 0.0}
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for k in keys:
+                v = self._lru.get(k)
+                if v is not None:
+                    self._lru.move_to_end(k)
+                    found[k] = v
+
+        if self._disk is not None:
+            missing = [k for k in keys if k not in found]
+            from_disk = self._disk.get_many(missing)
+            if from_disk:
+                self._store(from_disk)
+                found.update(from_disk)
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for k, v in items.items():
+                self._lru[k] = v
+                self._lru.move_to_end(k)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _account(self, kind: str, hits: int, misses: int, elapsed_ms: float) -> None:
+        with self._lock:
+            if misses:
+                per_text = elapsed_ms / misses
+                prev = self._avg_ms[kind]
+                self._avg_ms[kind] = per_text if prev == 0 else 0.8 * prev + 0.2 * per_text
+            saved = hits * self._avg_ms[kind]
+            self.hits += hits
+            self.misses += misses
+            self.saved_ms += saved
+
+        record("embedding_cache", "hits", hits)
+        record("embedding_cache", "misses", misses)
+        record("embedding_cache", "saved_ms", saved)
+
+    def _embed(self, kind: str, texts: List[str]) -> List[List[float]]:
+        normalized = [normalize_text(t) for t in texts]
+        keys = [self._key(t) for t in normalized]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # embed each distinct missing text once
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, normalized):
+            if k not in found and k not in missing:
+                missing[k] = t
+
+        elapsed_ms = 0.0
+        if missing:
+            t0 = time.perf_counter()
+            # identical concurrent misses share one upstream call
+            if kind == "query":
+                vectors = [self._flight.do(("query", k), functools.partial(self.base.embed_query, t)) for k, t in missing.items()]
+            else:
+                batch_key = ("documents", hashlib.sha256("".join(missing).encode("ascii")).hexdigest())
+                vectors = self._flight.do(batch_key, functools.partial(self.base.embed_documents, list(missing.values())))
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh)
+            if self._disk is not None:
+                self._disk.put_many(self.model, fresh)
+            found.update(fresh)
+
+        self._account(kind, hits=len(keys) - len(missing), misses=len(missing), elapsed_ms=elapsed_ms)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed("query", [text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed("documents", texts)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "model": self.model,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "disk_tier": self._disk is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "saved_ms": round(self.saved_ms, 1),
+            }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
@@ -0,0 +1,234 @@
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class IngestJournal:
+    """
+    Durable log of an ingestion run: which docs were embedded, which write
+    batches were committed to the collection, and how far along the run is.
+    A run left 'running' (crash, kill) or 'failed' can be resumed.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    root_dir TEXT NOT NULL,
+                    chunk_strategy TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    docs_total INTEGER NOT NULL,
+                    docs_unchanged INTEGER NOT NULL DEFAULT 0,
+                    started_at REAL NOT NULL,
+                    resumed_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS run_docs (
+                    run_id INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    batch_id INTEGER,
+                    chunks INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, source)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS batches (
+                    run_id INTEGER NOT NULL,
+                    batch_id INTEGER NOT NULL,
+                    docs INTEGER NOT NULL,
+                    records INTEGER NOT NULL,
+                    committed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, batch_id)
+                )
+                """
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # -------------------------
+    # Run lifecycle
+    # -------------------------
+    def start_run(self, root_dir: str, chunk_strategy: str, docs_total: int) -> int:
+        conn = self._connect()
+        try:
+            # a fresh run supersedes any unfinished one for the same target
+            conn.execute(
+                "UPDATE runs SET status = 'abandoned' "
+                "WHERE root_dir = ? AND chunk_strategy = ? AND status IN ('running', 'failed')",
+                (root_dir, chunk_strategy),
+            )
+            cur = conn.execute(
+                "INSERT INTO runs(root_dir, chunk_strategy, status, docs_total, started_at) VALUES (?, ?, 'running', ?, ?)",
+                (root_dir, chunk_strategy, docs_total, time.time()),
+            )
+            conn.commit()
+            return int(cur.lastrowid)
+        finally:
+            conn.close()
+
+    def resumable_run(self, root_dir: str, chunk_strategy: str) -> Optional[int]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT run_id FROM runs WHERE root_dir = ? AND chunk_strategy = ? "
+                "AND status IN ('running', 'failed') ORDER BY run_id DESC LIMIT 1",
+                (root_dir, chunk_strategy),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE runs SET status = 'running', resumed_at = ? WHERE run_id = ?", (time.time(), row[0]))
+            conn.commit()
+            return int(row[0])
+        finally:
+            conn.close()
+
+    def latest_run(self) -> Optional[int]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+            return int(row[0]) if row and row[0] is not None else None
+        finally:
+            conn.close()
+
+    def finish_run(self, run_id: int, status: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?", (status, time.time(), run_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def set_unchanged(self, run_id: int, count: int) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE runs SET docs_unchanged = MAX(docs_unchanged, ?) WHERE run_id = ?", (count, run_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    # -------------------------
+    # Per-doc / per-batch progress
+    # -------------------------
+    def committed_sources(self, run_id: int) -> Dict[str, str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT source, content_hash FROM run_docs WHERE run_id = ? AND status = 'committed'",
+                (run_id,),
+            ).fetchall()
+            return dict(rows)
+        finally:
+            conn.close()
+
+    def next_batch_id(self, run_id: int) -> int:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT COALESCE(MAX(batch_id), -1) FROM batches WHERE run_id = ?", (run_id,)).fetchone()
+            return int(row[0]) + 1
+        finally:
+            conn.close()
+
+    def mark_docs(self, run_id: int, status: str, docs: List[Tuple[str, str, int]], batch_id: Optional[int] = None) -> None:
+        """docs: (source, content_hash, chunks)"""
+        if not docs:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO run_docs(run_id, source, content_hash, status, batch_id, chunks, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, s, h, status, batch_id, n, now) for s, h, n in docs],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def commit_batch(self, run_id: int, batch_id: int, docs: List[Tuple[str, str, int]]) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO run_docs(run_id, source, content_hash, status, batch_id, chunks, updated_at) "
+                    "VALUES (?, ?, ?, 'committed', ?, ?, ?)",
+                    [(run_id, s, h, batch_id, n, now) for s, h, n in docs],
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO batches(run_id, batch_id, docs, records, committed_at) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, batch_id, len(docs), sum(n for _, _, n in docs), now),
+                )
+        finally:
+            conn.close()
+
+    def progress(self, run_id: int) -> Dict[str, object]:
+        conn = self._connect()
+        try:
+            run = conn.execute(
+                "SELECT root_dir, chunk_strategy, status, docs_total, docs_unchanged, started_at, resumed_at, finished_at "
+                "FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+            if run is None:
+                raise ValueError(f"Unknown ingestion run: {run_id}")
+            counts = dict(
+                conn.execute("SELECT status, COUNT(*) FROM run_docs WHERE run_id = ? GROUP BY status", (run_id,)).fetchall()
+            )
+            batches, records = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(records), 0) FROM batches WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            # rate measured since the run (or its latest resume) started
+            window_start = run[6] or run[5]
+            recent = conn.execute(
+                "SELECT COUNT(*) FROM run_docs WHERE run_id = ? AND status = 'committed' AND updated_at >= ?",
+                (run_id, window_start),
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+        root_dir, chunk_strategy, status, total, unchanged, started_at, resumed_at, finished_at = run
+        committed = counts.get("committed", 0)
+        failed = counts.get("failed", 0)
+        done = committed + failed + unchanged
+        end = finished_at or time.time()
+        elapsed = max(end - window_start, 1e-6)
+        rate = recent / elapsed
+        remaining = max(total - done, 0)
+        eta_s = remaining / rate if rate > 0 and status == "running" else None
+
+        return {
+            "run_id": run_id,
+            "root_dir": root_dir,
+            "chunk_strategy": chunk_strategy,
+            "status": status,
+            "docs_total": total,
+            "docs_done": done,
+            "committed": committed,
+            "embedded_uncommitted": counts.get("embedded", 0),
+            "unchanged": unchanged,
+            "failed": failed,
+            "batches": batches,
+            "records": records,
+            "percent": round(100.0 * done / total, 1) if total else 100.0,
+            "docs_per_s": round(rate, 2),
+            "eta_s": round(eta_s) if eta_s is not None else None,
+        }
@@ -1,6 +1,9 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -17,30 +20,102 @@ SKIP_FILES = {
 SKIP_DIRS = {".git", ".github", ".venv", "node_modules", "__pycache__"}
 
 
-def load_markdown_files(root_dir: str, max_files: Optional[int] = None) -> list[dict]:
+def _walk_markdown(root: str) -> Iterator[str]:
+    """
+    Depth-first os.scandir walk in name order. Skipped directories are
+    pruned before descending, so their contents are never listed.
+    """
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"Failed to list {current}: {e}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_DIRS:
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".md") and entry.name not in SKIP_FILES and entry.is_file():
+                    yield entry.path
+            except OSError as e:
+                logger.warning(f"Failed to stat {entry.path}: {e}")
+        stack.extend(reversed(subdirs))
+
+
+def count_markdown_files(root_dir: str, max_files: Optional[int] = None) -> int:
+    # Walk only (no reads); used to size progress reporting
+    count = 0
+    for _ in _walk_markdown(root_dir):
+        count += 1
+        if max_files and count >= max_files:
+            break
+    return count
+
+
+def _read_doc(path: str) -> Optional[dict]:
+    try:
+        st = os.stat(path)
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    except Exception as e:
+        logger.warning(f"Failed to load {path}: {e}")
+        return None
+    if not text.strip():
+        return None
+    return {"text": text, "source": path, "size": st.st_size, "mtime": st.st_mtime}
+
+
+def iter_markdown_files(root_dir: str, max_files: Optional[int] = None, workers: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream markdown docs ({"text", "source", "size", "mtime"}) in walk order.
+    Files are read on a thread pool with a bounded number of reads in
+    flight; the walk stops as soon as max_files docs were yielded.
+    """
     root = Path(root_dir)
     if not root.exists():
         raise FileNotFoundError(f"Path does not exist: {root_dir}")
 
-    documents: list[dict] = []
-    for path in root.rglob("*.md"):
-        # Skip hidden/system directories
-        if any(part in SKIP_DIRS for part in path.parts):
-            continue
+    if workers is None:
+        from app.core.settings import settings
 
-        # Skip noisy files
-        if path.name in SKIP_FILES:
-            continue
+        workers = settings.LOADER_READ_WORKERS
+    workers = max(1, workers)
 
+    count = 0
+    in_flight: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as pool:
+        paths = _walk_markdown(str(root))
         try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
-            if text.strip():
-                documents.append({"text": text, "source": str(path)})
-        except Exception as e:
-            logger.warning(f"Failed to load {path}: {e}")
+            for path in paths:
+                in_flight.append(pool.submit(_read_doc, path))
+                if len(in_flight) < workers * 4:
+                    continue
+                doc = in_flight.popleft().result()
+                if doc is not None:
+                    yield doc
+                    count += 1
+                    if max_files and count >= max_files:
+                        return
 
-        if max_files and len(documents) >= max_files:
-            break
+            while in_flight:
+                doc = in_flight.popleft().result()
+                if doc is not None:
+                    yield doc
+                    count += 1
+                    if max_files and count >= max_files:
+                        return
+        finally:
+            for f in in_flight:
+                f.cancel()
 
+
+def load_markdown_files(root_dir: str, max_files: Optional[int] = None) -> list[dict]:
+    documents = list(iter_markdown_files(root_dir, max_files=max_files))
     logger.info(f"Loaded {len(documents)} markdown documents from {root_dir}")
-    return documents
\ No newline at end of file
+    return documents
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    source: str
+    chunk_strategy: str
+    content_hash: str
+    embedding_model: str
+    chunk_ids: List[str] = field(default_factory=list)
+    updated_at: int = 0
+
+
+class IngestManifest:
+    """
+    Persistent record of what is indexed: one row per (source, chunk_strategy)
+    with the content hash and chunk ids written for it. Lets a re-run skip
+    unchanged files and delete chunks whose source was edited or removed.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    source TEXT NOT NULL,
+                    chunk_strategy TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    embedding_model TEXT NOT NULL,
+                    chunk_ids TEXT NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (source, chunk_strategy)
+                )
+                """
+            )
+            # chunks dropped as duplicates point at the canonical chunk that is stored instead
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_links (
+                    chunk_uid TEXT NOT NULL,
+                    chunk_strategy TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    canonical_uid TEXT NOT NULL,
+                    PRIMARY KEY (chunk_uid, chunk_strategy)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_links_canonical "
+                "ON chunk_links(canonical_uid, chunk_strategy)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def entries(self, chunk_strategy: str) -> Dict[str, ManifestEntry]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT source, chunk_strategy, content_hash, embedding_model, chunk_ids, updated_at "
+                "FROM sources WHERE chunk_strategy = ?",
+                (chunk_strategy,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return {
+            r[0]: ManifestEntry(
+                source=r[0],
+                chunk_strategy=r[1],
+                content_hash=r[2],
+                embedding_model=r[3],
+                chunk_ids=json.loads(r[4]),
+                updated_at=r[5],
+            )
+            for r in rows
+        }
+
+    def upsert(self, entry: ManifestEntry) -> None:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO sources"
+                "(source, chunk_strategy, content_hash, embedding_model, chunk_ids, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    entry.source,
+                    entry.chunk_strategy,
+                    entry.content_hash,
+                    entry.embedding_model,
+                    json.dumps(entry.chunk_ids),
+                    int(time.time()),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete(self, source: str, chunk_strategy: str) -> None:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(
+                "DELETE FROM sources WHERE source = ? AND chunk_strategy = ?",
+                (source, chunk_strategy),
+            )
+            conn.execute(
+                "DELETE FROM chunk_links WHERE source = ? AND chunk_strategy = ?",
+                (source, chunk_strategy),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def replace_links(self, source: str, chunk_strategy: str, links: Dict[str, str]) -> None:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(
+                "DELETE FROM chunk_links WHERE source = ? AND chunk_strategy = ?",
+                (source, chunk_strategy),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunk_links(chunk_uid, chunk_strategy, source, canonical_uid) "
+                "VALUES (?, ?, ?, ?)",
+                [(uid, chunk_strategy, source, canonical) for uid, canonical in links.items()],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def sources_linking_to(self, chunk_strategy: str, canonical_uids: List[str]) -> set:
+        if not canonical_uids:
+            return set()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            out = set()
+            # stay well under SQLite's bound-parameter limit
+            for i in range(0, len(canonical_uids), 500):
+                part = canonical_uids[i : i + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows = conn.execute(
+                    f"SELECT DISTINCT source FROM chunk_links "
+                    f"WHERE chunk_strategy = ? AND canonical_uid IN ({placeholders})",
+                    [chunk_strategy, *part],
+                ).fetchall()
+                out.update(r[0] for r in rows)
+            return out
+        finally:
+            conn.close()
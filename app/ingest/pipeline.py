@@ -1,11 +1,20 @@
 import logging
-from app.ingest.loader import load_markdown_files
-from app.ingest.chunker import fixed_chunk, semantic_chunk
+from app.ingest.loader import count_markdown_files, iter_markdown_files
+from app.ingest.chunker import Span, iter_chunk_spans
 from app.ingest.embedder import get_embedder
-from app.core.retry import retry_on_transient_failure
-from app.core.retryable import RetryableError
+from app.ingest.batcher import BatchStats, EmbeddingBatcher, EmbedItem, EmbedResult
+from app.ingest.dedup import ChunkDeduper
+from app.ingest.journal import IngestJournal
+from app.ingest.manifest import IngestManifest, ManifestEntry, content_hash
+from app.core.settings import settings
+from app.ingest.stages import threaded_stage
+from app.ingest.vector_cache import VectorCache, open_vector_cache, text_key
+from app.retrieval.vector_store import add_records, delete_records
 import hashlib
 from datetime import datetime, timezone
+from array import array
+from collections import OrderedDict
+from typing import Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +23,360 @@ def _doc_id_from_source(source: str) -> str:
     return hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
 
 
-@retry_on_transient_failure()
+def _chunk_uid(doc_id: str, chunk_strategy: str, chunk_id: int) -> str:
+    # Strategies share a store; the manifest and stale-id deletes are per strategy
+    return f"{doc_id}:{chunk_strategy}:{chunk_id}"
+
+
 def embed_chunks(embedder, chunks: list[str]) -> list[list[float]]:
-    try:
-        return embedder.embed_documents(chunks)
-    except Exception as e:
-        # Mark as retryable for now (we'll narrow this later to 429/5xx/timeouts)
-        raise RetryableError(str(e)) from e
+    # Retries, the circuit breaker and the retry budget live in the embedder
+    # (GuardedEmbeddings); 4xx errors surface as-is so the batcher can isolate them
+    return embedder.embed_documents(chunks)
+
+
+def _embed_docs_batched(
+    embedder,
+    docs_chunks: list[list[str]],
+    vector_cache: Optional[VectorCache] = None,
+) -> tuple[list[Optional[list[list[float]]]], BatchStats]:
+    """
+    Embed chunks of many documents in shared batches. Chunks found in the
+    on-disk vector cache are not sent to the API; fresh vectors are added to it.
+    Returns per-doc vectors (None for docs with a failed chunk) and batch stats.
+    """
+    model = getattr(embedder, "model", settings.EMBEDDING_MODEL)
+    keys = {(d, c): text_key(text) for d, chunks in enumerate(docs_chunks) for c, text in enumerate(chunks)}
+    cached = vector_cache.get_many(model, keys.values()) if vector_cache else {}
+
+    items = [
+        EmbedItem(key=(d, c), text=text)
+        for d, chunks in enumerate(docs_chunks)
+        for c, text in enumerate(chunks)
+        if keys[(d, c)] not in cached
+    ]
+    batcher = EmbeddingBatcher(
+        lambda texts: embed_chunks(embedder, texts),
+        max_tokens=settings.EMBED_BATCH_MAX_TOKENS,
+        max_items=settings.EMBED_BATCH_MAX_ITEMS,
+        workers=settings.EMBED_WORKERS,
+    )
+    result = batcher.embed(items) if items else EmbedResult()
+    result.stats.cached = len(keys) - len(items)
+
+    if vector_cache and result.vectors:
+        vector_cache.put_many(model, {keys[k]: v for k, v in result.vectors.items()})
+
+    failed_docs = {d for d, _ in result.errors}
+    out: list[Optional[list[list[float]]]] = []
+    for d, chunks in enumerate(docs_chunks):
+        if d in failed_docs:
+            out.append(None)
+        else:
+            out.append([
+                cached[keys[(d, c)]] if keys[(d, c)] in cached else result.vectors[(d, c)]
+                for c in range(len(chunks))
+            ])
+    return out, result.stats
+
+
+def _build_records(
+    doc: dict,
+    spans: list[Span],
+    vectors: list[Optional[list[float]]],
+    chunk_strategy: str,
+    duplicates: Optional[dict[int, str]] = None,
+) -> list[dict]:
+    """vectors align with spans; a None vector means the chunk was dropped as a duplicate."""
+    doc_id = _doc_id_from_source(doc["source"])
+    ingested_at = datetime.now(timezone.utc).isoformat()
+    duplicates = duplicates or {}
+    records = []
+    for idx, ((start, end, chunk), vector) in enumerate(zip(spans, vectors)):
+        if vector is None:
+            continue
+        chunk_id = idx
+        chunk_uid = _chunk_uid(doc_id, chunk_strategy, chunk_id)
+        records.append(
+            {
+                "id": chunk_uid,
+                "doc_id": doc_id,
+                "chunk_id": chunk_id,
+                "chunk_strategy": chunk_strategy,
+                "source": doc["source"],
+                "text": chunk,
+                "vector": vector,
+                "ingested_at": ingested_at,
+                "content_hash": doc.get("content_hash"),
+                "start_offset": start,
+                "end_offset": end,
+                "duplicate_of": duplicates.get(idx),
+            }
+        )
+    return records
+
+
+class _VectorLRU:
+    """Bounded float32 store of canonical chunk vectors for dedup reuse."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._items: "OrderedDict[str, array]" = OrderedDict()
+
+    def put(self, uid: str, vector: list[float]) -> None:
+        self._items[uid] = array("f", vector)
+        self._items.move_to_end(uid)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def get(self, uid: str) -> Optional[list[float]]:
+        v = self._items.get(uid)
+        if v is None:
+            return None
+        self._items.move_to_end(uid)
+        return v.tolist()
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._items
+
+
+def make_deduper() -> Optional[ChunkDeduper]:
+    if settings.DEDUP_MODE == "off":
+        return None
+    if settings.DEDUP_MODE not in ("reuse", "drop"):
+        raise ValueError(f"Unknown DEDUP_MODE: {settings.DEDUP_MODE}")
+    return ChunkDeduper(threshold=settings.DEDUP_NEAR_THRESHOLD)
+
+
+def iter_embedded_docs(
+    docs: Iterator[dict],
+    embedder,
+    chunk_strategy: str,
+    embed_stats: Optional[BatchStats] = None,
+    deduper: Optional[ChunkDeduper] = None,
+    vector_cache: Optional[VectorCache] = None,
+) -> Iterator[tuple[dict, Optional[list[dict]]]]:
+    """
+    Streaming core: load -> chunk -> dedup -> batched embed, each stage on
+    its own thread behind a bounded queue, so memory stays flat regardless
+    of corpus size. Yields (doc, records) per document; records is None
+    when one of the doc's chunks failed to embed.
+
+    With a deduper, duplicate chunks are not embedded: in "reuse" mode they
+    are stored with the canonical chunk's vector and a duplicate_of link,
+    in "drop" mode they are not stored and the links land in
+    doc["dedup_links"] for the manifest.
+    """
+    qsize = settings.INGEST_QUEUE_SIZE
+    window_chunks = settings.EMBED_BATCH_MAX_ITEMS * settings.EMBED_WORKERS
+    embed_stats = embed_stats if embed_stats is not None else BatchStats()
+    mode = settings.DEDUP_MODE
+    canonical_vectors = _VectorLRU(settings.DEDUP_VECTOR_CACHE)
+
+    def chunk_stage(it):
+        return iter_chunk_spans(it, chunk_strategy, workers=settings.CHUNK_WORKERS)
+
+    def dedup_stage(it):
+        for doc, spans in it:
+            dups: dict[int, str] = {}
+            if deduper is not None:
+                doc_id = _doc_id_from_source(doc["source"])
+                for idx, (_, _, text) in enumerate(spans):
+                    canonical = deduper.check(_chunk_uid(doc_id, chunk_strategy, idx), text)
+                    if canonical is not None:
+                        dups[idx] = canonical
+            yield doc, spans, dups
+
+    def embed_window(window):
+        window_canonicals = {
+            _chunk_uid(_doc_id_from_source(doc["source"]), chunk_strategy, idx)
+            for doc, spans, dups in window
+            for idx in range(len(spans))
+            if idx not in dups
+        }
+
+        def needs_embedding(idx: int, dups: dict[int, str]) -> bool:
+            if idx not in dups:
+                return True
+            # reuse mode: canonical vector must come from this window or the LRU
+            canonical = dups[idx]
+            return mode == "reuse" and canonical not in window_canonicals and canonical not in canonical_vectors
+
+        todo = [[idx for idx in range(len(spans)) if needs_embedding(idx, dups)] for _, spans, dups in window]
+        # Pin the LRU canonicals this window reuses before its own vectors go
+        # in: a full window can evict them in between
+        canonicals = {
+            dups[idx]: canonical_vectors.get(dups[idx])
+            for (_, _, dups), idxs in zip(window, todo)
+            for idx in dups
+            if mode == "reuse" and idx not in idxs and dups[idx] not in window_canonicals
+        }
+        vectors, stats = _embed_docs_batched(
+            embedder,
+            [[spans[idx][2] for idx in idxs] for (_, spans, _), idxs in zip(window, todo)],
+            vector_cache,
+        )
+        embed_stats.merge(stats)
+
+        for (doc, spans, dups), idxs, doc_vectors in zip(window, todo, vectors):
+            if doc_vectors is None:
+                continue
+            doc_id = _doc_id_from_source(doc["source"])
+            for idx, vector in zip(idxs, doc_vectors):
+                if idx not in dups:
+                    uid = _chunk_uid(doc_id, chunk_strategy, idx)
+                    canonicals[uid] = vector
+                    canonical_vectors.put(uid, vector)
+
+        for (doc, spans, dups), idxs, doc_vectors in zip(window, todo, vectors):
+            if doc_vectors is None:
+                yield doc, None
+                continue
+
+            by_idx = dict(zip(idxs, doc_vectors))
+            aligned: list[Optional[list[float]]] = []
+            links: dict[str, str] = {}
+            failed = False
+            for idx in range(len(spans)):
+                if idx in by_idx:
+                    aligned.append(by_idx[idx])
+                elif mode == "drop":
+                    aligned.append(None)
+                    links[_chunk_uid(_doc_id_from_source(doc["source"]), chunk_strategy, idx)] = dups[idx]
+                else:
+                    vector = canonicals.get(dups[idx])
+                    if vector is None:
+                        # canonical's doc failed to embed in this window
+                        failed = True
+                        break
+                    aligned.append(vector)
+
+            if failed:
+                yield doc, None
+                continue
+            doc["dedup_links"] = links
+            yield doc, _build_records(doc, spans, aligned, chunk_strategy, dups if mode == "reuse" else None)
+
+    def embed_stage(it):
+        # Fill roughly one full batch per worker before dispatching
+        window, n = [], 0
+        for doc, spans, dups in it:
+            window.append((doc, spans, dups))
+            n += len(spans) - len(dups)
+            if n >= window_chunks:
+                yield from embed_window(window)
+                window, n = [], 0
+        if window:
+            yield from embed_window(window)
+
+    loaded = threaded_stage(lambda it: it, docs, qsize, "load")
+    chunked = threaded_stage(chunk_stage, loaded, qsize, "chunk")
+    deduped = threaded_stage(dedup_stage, chunked, qsize, "dedup")
+    return threaded_stage(embed_stage, deduped, qsize, "embed")
+
+
+def invalidate_linked_sources(manifest: IngestManifest, chunk_strategy: str, chunk_ids: list[str], exclude: set = frozenset()) -> None:
+    """
+    Chunks dropped as duplicates rely on their canonical chunk. When that
+    chunk is rewritten or deleted, forget the linking sources so the next
+    run re-ingests them.
+    """
+    for source in manifest.sources_linking_to(chunk_strategy, chunk_ids) - set(exclude):
+        manifest.delete(source, chunk_strategy)
+        logger.info(f"[{chunk_strategy}] canonical chunk changed, queued for re-ingest source={source}")
+
+
+class _StoreWriter:
+    """
+    Buffers embedded docs and writes them in batches: stale chunk ids of
+    changed docs are deleted, records upserted, then the manifest updated.
+    With a journal, each batch is logged as embedded before the write and
+    committed after it.
+    """
+
+    def __init__(
+        self,
+        store,
+        manifest: IngestManifest,
+        chunk_strategy: str,
+        model: str,
+        summary: dict,
+        journal: Optional[IngestJournal] = None,
+        run_id: Optional[int] = None,
+    ) -> None:
+        self.store = store
+        self.manifest = manifest
+        self.chunk_strategy = chunk_strategy
+        self.model = model
+        self.summary = summary
+        self.journal = journal
+        self.run_id = run_id
+        self._batch_id = journal.next_batch_id(run_id) if journal else 0
+        self._pending: list[tuple[dict, list[dict], Optional[ManifestEntry]]] = []
+        self._pending_records = 0
+
+    def add(self, doc: dict, records: list[dict], entry: Optional[ManifestEntry]) -> None:
+        self._pending.append((doc, records, entry))
+        self._pending_records += len(records)
+        if self._pending_records >= settings.INGEST_WRITE_BATCH:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+
+        stale: list[str] = []
+        rewritten: list[str] = []
+        records: list[dict] = []
+        for doc, doc_records, entry in self._pending:
+            if entry:
+                keep = {r["id"] for r in doc_records}
+                stale.extend(cid for cid in entry.chunk_ids if cid not in keep)
+                rewritten.extend(entry.chunk_ids)
+            records.extend(doc_records)
+
+        journal_docs = [(doc["source"], doc["content_hash"], len(doc_records)) for doc, doc_records, _ in self._pending]
+        if self.journal:
+            self.journal.mark_docs(self.run_id, "embedded", journal_docs, batch_id=self._batch_id)
+
+        delete_records(self.store, stale)
+        if records:
+            add_records(self.store, records)
+
+        pending_sources = {doc["source"] for doc, _, _ in self._pending}
+        invalidate_linked_sources(self.manifest, self.chunk_strategy, rewritten, exclude=pending_sources)
+
+        for doc, doc_records, entry in self._pending:
+            self.manifest.upsert(
+                ManifestEntry(
+                    source=doc["source"],
+                    chunk_strategy=self.chunk_strategy,
+                    content_hash=doc["content_hash"],
+                    embedding_model=self.model,
+                    chunk_ids=[r["id"] for r in doc_records],
+                )
+            )
+            self.manifest.replace_links(doc["source"], self.chunk_strategy, doc.get("dedup_links") or {})
+            self.summary["changed" if entry else "added"] += 1
+            logger.info(f"[{self.chunk_strategy}] {'changed' if entry else 'added'} chunks={len(doc_records)} source={doc['source']}")
+
+        self.summary["chunks_embedded"] += len(records)
+        self.summary["chunks_deleted"] += len(stale)
+        self._pending, self._pending_records = [], 0
+
+        if self.journal:
+            self.journal.commit_batch(self.run_id, self._batch_id, journal_docs)
+            self.journal.set_unchanged(self.run_id, self.summary["unchanged"])
+            _log_progress(self.journal.progress(self.run_id))
+        self._batch_id += 1
+
+
+def _log_progress(progress: dict) -> None:
+    eta = f"{progress['eta_s']}s" if progress["eta_s"] is not None else "n/a"
+    logger.info(
+        f"Run {progress['run_id']}: {progress['docs_done']}/{progress['docs_total']} docs "
+        f"({progress['percent']}%) batches={progress['batches']} "
+        f"docs/s={progress['docs_per_s']} eta={eta}"
+    )
 
 
 def run_ingestion(root_dir: str, max_docs: int = 20, chunk_strategy: str = "fixed") -> list[dict]:
@@ -28,42 +384,136 @@ def run_ingestion(root_dir: str, max_docs: int = 20, chunk_strategy: str = "fixe
     Ingest a limited number of docs first to control cost.
     We'll scale up after everything is stable.
     """
-    docs = load_markdown_files(root_dir)
-    docs = docs[:max_docs]
-    logger.info(f"Ingesting {len(docs)} documents (max_docs={max_docs})")
+    logger.info(f"Ingesting up to {max_docs} documents")
 
-    embedder = get_embedder()
+    embedder = get_embedder(priority="background")
+    embed_stats = BatchStats()
     records = []
 
-    for doc in docs:
-        if chunk_strategy == "fixed":
-            chunks = fixed_chunk(doc["text"])
-        elif chunk_strategy == "semantic":
-            chunks = semantic_chunk(doc["text"])
-        else:
-            raise ValueError(f"Unknown chunk_strategy: {chunk_strategy}")
-        
-        vectors = embed_chunks(embedder, chunks)
-
-        doc_id = _doc_id_from_source(doc["source"])
-
-        logger.info(f"[{chunk_strategy}] doc_id={doc_id} chunks={len(chunks)} source={doc['source']}")
-
-        for idx, (chunk, vector) in enumerate(zip(chunks, vectors)):
-            chunk_id = idx
-            chunk_uid = f"{doc_id}:{chunk_id}"
-            records.append(
-                {
-                    "id": chunk_uid,
-                    "doc_id": doc_id,
-                    "chunk_id": chunk_id,
-                    "chunk_strategy": chunk_strategy,
-                    "source": doc["source"],
-                    "text": chunk,
-                    "vector": vector,
-                    "ingested_at": datetime.now(timezone.utc).isoformat(),
-                }
-            )
+    docs = iter_markdown_files(root_dir, max_files=max_docs)
+    deduper = make_deduper()
+    vector_cache = open_vector_cache()
+    try:
+        embedded = list(iter_embedded_docs(docs, embedder, chunk_strategy, embed_stats, deduper, vector_cache))
+    finally:
+        if vector_cache:
+            vector_cache.close()
+
+    for doc, doc_records in embedded:
+        if doc_records is None:
+            logger.warning(f"[{chunk_strategy}] skipped (embedding failed) source={doc['source']}")
+            continue
+
+        logger.info(f"[{chunk_strategy}] doc_id={_doc_id_from_source(doc['source'])} chunks={len(doc_records)} source={doc['source']}")
+
+        records.extend(doc_records)
+
+    dedup_stats = deduper.stats.as_dict(settings.DEDUP_MODE) if deduper else None
+    logger.info(f"Ingestion complete. Records={len(records)} embed_stats={embed_stats.as_dict()} dedup={dedup_stats}")
+    return records
+
+
+def sync_vector_store(
+    root_dir: str,
+    store,
+    chunk_strategy: str = "semantic",
+    max_docs: Optional[int] = None,
+    manifest_path: Optional[str] = None,
+    resume: bool = False,
+    journal_path: Optional[str] = None,
+) -> dict:
+    """
+    Incremental, streaming ingestion against the manifest: only new or
+    changed files are chunked and embedded, writes go out in batches while
+    later docs are still embedding, stale chunk ids are deleted.
+    Deleted sources are only detected on a full scan (max_docs=None).
+
+    Every run is journaled (INGEST_JOURNAL_PATH). With resume=True the last
+    unfinished run for this root/strategy is continued: docs it already
+    committed are skipped, and docs embedded but not yet written get their
+    vectors back from the vector cache instead of the API.
+    """
+    manifest = IngestManifest(manifest_path or settings.INGEST_MANIFEST_PATH)
+    journal = IngestJournal(journal_path or settings.INGEST_JOURNAL_PATH)
+    model = settings.EMBEDDING_MODEL
+    known = manifest.entries(chunk_strategy)
+    # ingestion yields to live traffic in the embeddings limiter
+    embedder = get_embedder(model, priority="background")
+
+    run_id = journal.resumable_run(root_dir, chunk_strategy) if resume else None
+    if run_id is not None:
+        committed = journal.committed_sources(run_id)
+        logger.info(f"Resuming run {run_id}: {len(committed)} docs already committed")
+    else:
+        if resume:
+            logger.info("No unfinished run to resume; starting a new one")
+        committed = {}
+        run_id = journal.start_run(root_dir, chunk_strategy, count_markdown_files(root_dir, max_docs))
+
+    summary = {
+        "run_id": run_id,
+        "added": 0, "changed": 0, "unchanged": 0, "resumed": 0, "deleted": 0, "failed": 0,
+        "chunks_embedded": 0, "chunks_deleted": 0,
+    }
+    seen: set[str] = set()
+
+    def changed_docs(docs: Iterator[dict]) -> Iterator[dict]:
+        for doc in docs:
+            seen.add(doc["source"])
+            doc["content_hash"] = content_hash(doc["text"])
+            if committed.get(doc["source"]) == doc["content_hash"]:
+                summary["resumed"] += 1
+                continue
+            entry = known.get(doc["source"])
+            if entry and entry.content_hash == doc["content_hash"] and entry.embedding_model == model:
+                summary["unchanged"] += 1
+                continue
+            yield doc
+
+    embed_stats = BatchStats()
+    deduper = make_deduper()
+    vector_cache = open_vector_cache()
+    writer = _StoreWriter(store, manifest, chunk_strategy, model, summary, journal, run_id)
+    docs = changed_docs(iter_markdown_files(root_dir, max_files=max_docs))
+
+    try:
+        for doc, records in iter_embedded_docs(docs, embedder, chunk_strategy, embed_stats, deduper, vector_cache):
+            if records is None:
+                # Left out of the manifest so the next run retries it
+                summary["failed"] += 1
+                journal.mark_docs(run_id, "failed", [(doc["source"], doc["content_hash"], 0)])
+                logger.warning(f"[{chunk_strategy}] skipped (embedding failed) source={doc['source']}")
+                continue
+            writer.add(doc, records, known.get(doc["source"]))
+        writer.flush()
+    except BaseException:
+        # Committed batches stay recorded; --resume continues from here
+        journal.finish_run(run_id, "failed")
+        raise
+    finally:
+        if vector_cache:
+            vector_cache.enforce_limit(settings.VECTOR_CACHE_MAX_MB * 1024 * 1024)
+            vector_cache.close()
+
+    if max_docs is None:
+        for source, entry in known.items():
+            if source in seen:
+                continue
+            delete_records(store, entry.chunk_ids)
+            manifest.delete(source, chunk_strategy)
+            invalidate_linked_sources(manifest, chunk_strategy, entry.chunk_ids)
+            summary["deleted"] += 1
+            summary["chunks_deleted"] += len(entry.chunk_ids)
+            logger.info(f"[{chunk_strategy}] deleted chunks={len(entry.chunk_ids)} source={source}")
+    else:
+        logger.info("Partial scan (max_docs set): skipping deleted-source detection")
+
+    journal.set_unchanged(run_id, summary["unchanged"])
+    journal.finish_run(run_id, "completed")
+    summary["progress"] = journal.progress(run_id)
 
-    logger.info(f"Ingestion complete. Embedded chunks={len(records)}")
-    return records
\ No newline at end of file
+    summary["embed"] = embed_stats.as_dict()
+    if deduper:
+        summary["dedup"] = deduper.stats.as_dict(settings.DEDUP_MODE)
+    logger.info(f"Sync complete: {summary}")
+    return summary
@@ -0,0 +1,62 @@
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+_END = object()
+
+
+class _StageError:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def threaded_stage(
+    fn: Callable[[Iterator[T]], Iterable[U]],
+    upstream: Iterator[T],
+    maxsize: int,
+    name: str,
+) -> Iterator[U]:
+    """
+    Run `fn(upstream)` on its own thread and hand its outputs downstream
+    through a bounded queue. The producer blocks when the consumer falls
+    behind, so a chain of stages keeps at most ~maxsize items per hop in
+    memory. Exceptions are re-raised in the consumer; closing the consumer
+    stops the producer.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def run() -> None:
+        try:
+            for item in fn(upstream):
+                if not _put(q, item, stop):
+                    return
+            _put(q, _END, stop)
+        except BaseException as e:
+            _put(q, _StageError(e), stop)
+
+    t = threading.Thread(target=run, name=f"ingest-{name}", daemon=True)
+    t.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, _StageError):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
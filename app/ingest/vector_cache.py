@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class VectorCache:
+    """
+    On-disk chunk embedding cache keyed by (model, sha256(text)).
+
+    Vectors are appended as raw float32 to a data file; a SQLite index maps
+    each key to (offset, dim, last_used). Compaction writes a new data file
+    generation and swaps it in with the index update in one transaction, so
+    a crash mid-compaction leaves the previous generation intact.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                model TEXT NOT NULL,
+                key TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                dim INTEGER NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, key)
+            )
+            """
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta(name, value) VALUES ('generation', '0')")
+        self._conn.commit()
+
+        self._generation = int(self._conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()[0])
+        self._open_data_file()
+
+    def _data_path(self, generation: int) -> str:
+        return os.path.join(self.cache_dir, f"vectors.{generation}.f32")
+
+    def _open_data_file(self) -> None:
+        self._data = open(self._data_path(self._generation), "a+b")
+
+    def get_many(self, model: str, keys: Iterable[str]) -> Dict[str, List[float]]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        found: Dict[str, List[float]] = {}
+        now = int(time.time())
+        with self._lock:
+            rows = []
+            for i in range(0, len(keys), 500):
+                part = keys[i : i + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows.extend(
+                    self._conn.execute(
+                        f"SELECT key, offset, dim FROM entries WHERE model = ? AND key IN ({placeholders})",
+                        [model, *part],
+                    ).fetchall()
+                )
+
+            fd = self._data.fileno()
+            for key, offset, dim in rows:
+                blob = os.pread(fd, dim * 4, offset)
+                if len(blob) != dim * 4:
+                    logger.warning(f"Vector cache entry truncated key={key[:12]}; ignoring")
+                    continue
+                vec = array("f")
+                vec.frombytes(blob)
+                found[key] = vec.tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE model = ? AND key = ?",
+                    [(now, model, k) for k in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        now = int(time.time())
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            rows = []
+            for key, vector in items.items():
+                offset = self._data.tell()
+                self._data.write(array("f", vector).tobytes())
+                rows.append((model, key, offset, len(vector), now))
+            # data must be on disk before the index points at it
+            self._data.flush()
+            os.fsync(self._data.fileno())
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries(model, key, offset, dim, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            per_model = self._conn.execute(
+                "SELECT model, COUNT(*), SUM(dim) * 4 FROM entries GROUP BY model"
+            ).fetchall()
+            data_bytes = os.path.getsize(self._data_path(self._generation))
+        live_bytes = sum(r[2] or 0 for r in per_model)
+        return {
+            "cache_dir": self.cache_dir,
+            "generation": self._generation,
+            "entries": sum(r[1] for r in per_model),
+            "live_bytes": live_bytes,
+            "data_bytes": data_bytes,
+            "dead_bytes": data_bytes - live_bytes,
+            "models": {r[0]: r[1] for r in per_model},
+        }
+
+    def prune(self, max_bytes: Optional[int] = None, model: Optional[str] = None) -> Dict[str, int]:
+        """
+        Evict least-recently-used entries until live data fits max_bytes
+        (and/or drop a whole model), then compact the data file.
+        """
+        with self._lock:
+            evicted = 0
+            if model is not None:
+                evicted += self._conn.execute("DELETE FROM entries WHERE model = ?", (model,)).rowcount
+
+            if max_bytes is not None:
+                live = self._conn.execute("SELECT COALESCE(SUM(dim) * 4, 0) FROM entries").fetchone()[0]
+                if live > max_bytes:
+                    to_free = live - max_bytes
+                    victims = []
+                    for m, k, dim in self._conn.execute("SELECT model, key, dim FROM entries ORDER BY last_used ASC"):
+                        if to_free <= 0:
+                            break
+                        victims.append((m, k))
+                        to_free -= dim * 4
+                    self._conn.executemany("DELETE FROM entries WHERE model = ? AND key = ?", victims)
+                    evicted += len(victims)
+            self._conn.commit()
+
+            before = os.path.getsize(self._data_path(self._generation))
+            self._compact()
+            after = os.path.getsize(self._data_path(self._generation))
+
+        logger.info(f"Vector cache pruned evicted={evicted} bytes_before={before} bytes_after={after}")
+        return {"evicted": evicted, "bytes_before": before, "bytes_after": after}
+
+    def enforce_limit(self, max_bytes: int) -> None:
+        if os.path.getsize(self._data_path(self._generation)) > max_bytes:
+            self.prune(max_bytes=max_bytes)
+
+    def _compact(self) -> None:
+        old_gen = self._generation
+        new_gen = old_gen + 1
+        src_fd = self._data.fileno()
+
+        rows = self._conn.execute("SELECT model, key, offset, dim FROM entries ORDER BY offset").fetchall()
+        updates = []
+        with open(self._data_path(new_gen), "wb") as dst:
+            for m, k, offset, dim in rows:
+                updates.append((dst.tell(), m, k))
+                dst.write(os.pread(src_fd, dim * 4, offset))
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        with self._conn:
+            self._conn.executemany("UPDATE entries SET offset = ? WHERE model = ? AND key = ?", updates)
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'generation'", (str(new_gen),))
+
+        self._data.close()
+        self._generation = new_gen
+        self._open_data_file()
+        os.remove(self._data_path(old_gen))
+
+    def close(self) -> None:
+        with self._lock:
+            self._data.close()
+            self._conn.close()
+
+
+def open_vector_cache() -> Optional[VectorCache]:
+    from app.core.settings import settings
+
+    if not settings.VECTOR_CACHE_DIR:
+        return None
+    return VectorCache(settings.VECTOR_CACHE_DIR)
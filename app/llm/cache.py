@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+
+from app.core.request_stats import record
+from app.core.settings import settings
+from app.core.singleflight import get_flight
+from app.llm.client import ainvoke_chat, invoke_chat, usage_of
+
+logger = logging.getLogger(__name__)
+
+# (content, usage, created_at)
+_Entry = Tuple[str, Dict[str, Any], int]
+
+# Chat model parameters that change the completion; anything else (keys, clients) is ignored
+_PARAM_KEYS = ("model_name", "model", "temperature", "max_tokens", "top_p", "seed", "stop", "n")
+
+
+def _plain_messages(messages: list) -> List[Dict[str, Any]]:
+    out = []
+    for m in messages:
+        if isinstance(m, dict):
+            out.append({"role": m.get("role"), "content": m.get("content")})
+        else:
+            out.append({"role": getattr(m, "type", None), "content": getattr(m, "content", None)})
+    return out
+
+
+def _model_params(llm) -> Dict[str, Any]:
+    params = getattr(llm, "_identifying_params", None) or {}
+    if not params:
+        params = {"model_name": getattr(llm, "model_name", None), "temperature": getattr(llm, "temperature", None)}
+    return {k: params[k] for k in _PARAM_KEYS if params.get(k) is not None}
+
+
+def cache_key(params: Dict[str, Any], messages: list) -> str:
+    payload = json.dumps({"params": params, "messages": _plain_messages(messages)}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _SQLiteTier:
+    def __init__(self, db_path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                usage TEXT NOT NULL,
+                created_at INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, usage, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def put(self, key: str, model: str, entry: _Entry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, content, usage, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, entry[0], json.dumps(entry[1]), entry[2]),
+            )
+            self._conn.commit()
+
+    def purge_expired(self, ttl_s: int) -> int:
+        with self._lock:
+            n = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (int(time.time()) - ttl_s,)).rowcount
+            self._conn.commit()
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of chat completions keyed by sha256(model params +
+    message list). In-memory LRU first, then an optional SQLite tier; both
+    honour the TTL. Only meant for deterministic (temperature=0) prompts.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None, ttl_s: int = 86400) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lru: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _SQLiteTier(db_path) if db_path else None
+        if self._disk is not None:
+            self._disk.purge_expired(ttl_s)
+
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    def _fresh(self, entry: Optional[_Entry]) -> bool:
+        return entry is not None and entry[2] + self.ttl_s >= time.time()
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _get_memory(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            if not self._fresh(entry):
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return entry
+
+    def _get_disk(self, key: str) -> Optional[_Entry]:
+        if self._disk is None:
+            return None
+        entry = self._disk.get(key)
+        if not self._fresh(entry):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def get(self, key: str) -> Optional[_Entry]:
+        return self._get_memory(key) or self._get_disk(key)
+
+    async def aget(self, key: str) -> Optional[_Entry]:
+        entry = self._get_memory(key)
+        if entry is None and self._disk is not None:
+            entry = await asyncio.to_thread(self._get_disk, key)
+        return entry
+
+    def put(self, key: str, model: str, content: str, usage: Dict[str, Any]) -> None:
+        entry = (content, usage, int(time.time()))
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk.put(key, model, entry)
+
+    def account(self, step: str, hit: bool, tokens_saved: int = 0) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.tokens_saved += tokens_saved
+            else:
+                self.misses += 1
+        record("llm_cache", "hits" if hit else "misses")
+        if hit:
+            record("llm_cache", "tokens_saved", tokens_saved)
+        logger.debug(f"llm_cache {'hit' if hit else 'miss'} step={step}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "disk_tier": self._disk is not None,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "tokens_saved": self.tokens_saved,
+            }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+
+def _cached_steps() -> set:
+    return {s.strip() for s in settings.LLM_CACHE_STEPS.split(",") if s.strip()}
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    from app.core.resources import registry
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return registry.get_or_create(
+        ("llm_cache",),
+        lambda: LLMResponseCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            db_path=settings.LLM_CACHE_DB_PATH,
+            ttl_s=settings.LLM_CACHE_TTL_SECONDS,
+        ),
+    )
+
+
+def _deterministic_key(llm, messages: list) -> Optional[Tuple[str, Dict[str, Any]]]:
+    params = _model_params(llm)
+    # sampling makes completions non-deterministic; never cache or share those
+    if params.get("temperature") not in (None, 0, 0.0):
+        return None
+    return cache_key(params, messages), params
+
+
+def _cache_for(step: str) -> Optional[LLMResponseCache]:
+    return get_llm_cache() if step in _cached_steps() else None
+
+
+def _hit_message(cache: LLMResponseCache, step: str, entry: _Entry) -> AIMessage:
+    content, usage, _ = entry
+    saved = int(usage.get("total_tokens", 0) or 0)
+    cache.account(step, hit=True, tokens_saved=saved)
+    # Shaped like a fresh response so callers record it under stats["tokens"][step]
+    return AIMessage(
+        content=content,
+        response_metadata={
+            "token_usage": {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "cache_hit": True,
+                "tokens_saved": saved,
+            }
+        },
+    )
+
+
+def _store_miss(cache: LLMResponseCache, key: str, params: Dict[str, Any], step: str, result) -> None:
+    cache.account(step, hit=False)
+    if isinstance(getattr(result, "content", None), str):
+        model = str(params.get("model_name") or params.get("model") or "")
+        cache.put(key, model, result.content, usage_of(result))
+
+
+def invoke_cached(llm, messages: list, step: str):
+    """
+    llm.invoke(messages) behind the "chat" breaker and retry budget. For
+    temperature=0 prompts, identical concurrent calls share one request and
+    steps listed in LLM_CACHE_STEPS are also served from the response cache.
+    """
+    det = _deterministic_key(llm, messages)
+    if det is None:
+        return invoke_chat(llm, messages)
+
+    key, params = det
+    cache = _cache_for(step)
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            return _hit_message(cache, step, entry)
+
+    def call():
+        result = invoke_chat(llm, messages)
+        if cache is not None:
+            _store_miss(cache, key, params, step, result)
+        return result
+
+    return get_flight("llm").do(key, call)
+
+
+async def ainvoke_cached(llm, messages: list, step: str):
+    det = _deterministic_key(llm, messages)
+    if det is None:
+        return await ainvoke_chat(llm, messages)
+
+    key, params = det
+    cache = _cache_for(step)
+    if cache is not None:
+        entry = await cache.aget(key)
+        if entry is not None:
+            return _hit_message(cache, step, entry)
+
+    async def call():
+        result = await ainvoke_chat(llm, messages)
+        if cache is not None:
+            await asyncio.to_thread(_store_miss, cache, key, params, step, result)
+        return result
+
+    return await get_flight("llm").ado(key, call)
@@ -1,10 +1,147 @@
+import asyncio
 import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+import httpx
 from langchain_openai import ChatOpenAI
 
+from app.core.limiter import get_limiter
+from app.core.resources import registry
+from app.core.retry import retry_on_transient_failure
+from app.core.settings import settings
+from app.ingest.batcher import estimate_tokens
+
 logger = logging.getLogger(__name__)
 
-def get_chat_model():
-    # Start cheap + solid. You can switch later.
-    model_name = "gpt-4o-mini"
-    logger.info(f"Using chat model: {model_name}")
-    return ChatOpenAI(model=model_name, temperature=0)
\ No newline at end of file
+ROLES = ("planner", "rewriter", "answerer", "critic")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    role: str
+    model: str
+    temperature: float
+    max_tokens: Optional[int]
+    timeout_s: float
+
+
+def model_spec(role: str) -> ModelSpec:
+    """The LLM_<ROLE>_* settings for a role; unset values fall back to the defaults."""
+    if role not in ROLES:
+        raise ValueError(f"Unknown model role: {role}")
+    prefix = f"LLM_{role.upper()}_"
+    model = getattr(settings, prefix + "MODEL") or settings.LLM_DEFAULT_MODEL
+    timeout = getattr(settings, prefix + "TIMEOUT_SECONDS") or settings.HTTP_TIMEOUT_SECONDS
+    return ModelSpec(
+        role=role,
+        model=model,
+        temperature=getattr(settings, prefix + "TEMPERATURE"),
+        max_tokens=getattr(settings, prefix + "MAX_TOKENS"),
+        timeout_s=timeout,
+    )
+
+
+def model_routes() -> Dict[str, Dict[str, Any]]:
+    return {role: asdict(model_spec(role)) for role in ROLES}
+
+
+class HTTPPool:
+    """
+    One sync and one async httpx client shared by every chat model, so all
+    roles reuse the same keep-alive connections to the API.
+    """
+
+    def __init__(self) -> None:
+        limits = httpx.Limits(
+            max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+        )
+        # per-request timeouts are set on each model; this is only the fallback
+        timeout = httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS)
+        self.client = httpx.Client(limits=limits, timeout=timeout)
+        self.async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    def close(self) -> None:
+        # for callers without an event loop; inside one, await aclose()
+        self.client.close()
+        asyncio.run(self.async_client.aclose())
+
+    async def aclose(self) -> None:
+        self.client.close()
+        await self.async_client.aclose()
+
+
+def get_http_pool() -> HTTPPool:
+    return registry.get_or_create(("http_pool", "openai"), HTTPPool)
+
+
+def _build_chat_model(spec: ModelSpec) -> ChatOpenAI:
+    pool = get_http_pool()
+    logger.info(
+        f"Using chat model: role={spec.role} model={spec.model} temperature={spec.temperature} "
+        f"max_tokens={spec.max_tokens} timeout_s={spec.timeout_s}"
+    )
+    return ChatOpenAI(
+        model=spec.model,
+        temperature=spec.temperature,
+        max_tokens=spec.max_tokens,
+        timeout=spec.timeout_s,
+        # retries go through the "chat" circuit breaker / retry budget instead
+        max_retries=0,
+        http_client=pool.client,
+        http_async_client=pool.async_client,
+    )
+
+
+def get_chat_model(role: str = "answerer") -> ChatOpenAI:
+    """Long-lived chat client for a role (planner | rewriter | answerer | critic)."""
+    spec = model_spec(role)
+    # keyed on the spec, so a changed setting gets a fresh client instead of a stale one
+    return registry.get_or_create(("chat", *asdict(spec).values()), lambda: _build_chat_model(spec))
+
+
+def usage_of(result) -> Dict[str, Any]:
+    rm = getattr(result, "response_metadata", None) or {}
+    usage = rm.get("token_usage") or rm.get("usage")
+    if isinstance(usage, dict):
+        return usage
+    um = getattr(result, "usage_metadata", None)
+    if isinstance(um, dict):
+        return {
+            "prompt_tokens": um.get("input_tokens", 0),
+            "completion_tokens": um.get("output_tokens", 0),
+            "total_tokens": um.get("total_tokens", 0),
+        }
+    return {}
+
+
+def estimate_chat_tokens(llm, messages: list) -> int:
+    """Prompt estimate plus the completion ceiling; settled against real usage after the call."""
+    prompt = sum(
+        estimate_tokens(str(m.get("content", "") if isinstance(m, dict) else getattr(m, "content", "")))
+        for m in messages
+    )
+    return prompt + (getattr(llm, "max_tokens", None) or settings.LIMITER_DEFAULT_COMPLETION_TOKENS)
+
+
+def latency_key(llm) -> str:
+    """Limiter call class of a chat model: calls with another model or completion cap aren't comparable."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+    return f"{model}:max_tokens={getattr(llm, 'max_tokens', None)}"
+
+
+@retry_on_transient_failure("chat")
+def invoke_chat(llm, messages: list):
+    with get_limiter("chat").slot(estimate_chat_tokens(llm, messages), latency_key=latency_key(llm)) as slot:
+        result = llm.invoke(messages)
+        slot.used(usage_of(result).get("total_tokens"))
+    return result
+
+
+@retry_on_transient_failure("chat")
+async def ainvoke_chat(llm, messages: list):
+    async with get_limiter("chat").slot(estimate_chat_tokens(llm, messages), latency_key=latency_key(llm)) as slot:
+        result = await llm.ainvoke(messages)
+        slot.used(usage_of(result).get("total_tokens"))
+    return result
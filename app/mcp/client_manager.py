@@ -0,0 +1,382 @@
+import asyncio
+import bisect
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+from app.core.circuit import as_retryable
+from app.core.retryable import UpstreamNotConnectedError, UpstreamTimeoutError
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _to_plain(x: Any) -> Any:
+    # Pydantic v2
+    if hasattr(x, "model_dump"):
+        return x.model_dump()
+    # Pydantic v1
+    if hasattr(x, "dict"):
+        return x.dict()
+
+    if isinstance(x, list):
+        return [_to_plain(i) for i in x]
+    if isinstance(x, dict):
+        return {k: _to_plain(v) for k, v in x.items()}
+
+    return x
+
+
+def _unwrap(res: Any) -> Any:
+    # 1) unwrap result envelope
+    payload = None
+    if hasattr(res, "data"):
+        payload = res.data
+    elif hasattr(res, "content"):
+        payload = res.content
+    else:
+        payload = res
+
+    # 2) convert pydantic models -> dict/list
+    return _to_plain(payload)
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float, ok: bool) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS_MS, ms)] += 1
+        self.total_ms += ms
+        if not ok:
+            self.errors += 1
+
+    def _quantile(self, q: float) -> Optional[float]:
+        # upper bound of the bucket holding the q-th call; None past the last bound
+        n = sum(self.counts)
+        seen = 0
+        for bound, count in zip(_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= q * n:
+                return float(bound)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        n = sum(self.counts)
+        labels = [f"le_{b}" for b in _BUCKETS_MS] + [f"gt_{_BUCKETS_MS[-1]}"]
+        return {
+            "count": n,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / n, 1) if n else 0.0,
+            "p50_ms": self._quantile(0.5) if n else None,
+            "p95_ms": self._quantile(0.95) if n else None,
+            "buckets_ms": dict(zip(labels, self.counts)),
+        }
+
+
+class _Session:
+    """One long-lived MCP session, kept open (and reopened) by its own task on the manager's loop."""
+
+    def __init__(self, manager: "MCPClientManager", idx: int) -> None:
+        self.manager = manager
+        self.idx = idx
+        self.client: Optional[Client] = None
+        self.in_flight = 0
+        self.reconnects = 0
+        self.connected_at: Optional[float] = None
+        self._broken: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.client is not None
+
+    def mark_broken(self, reason: str) -> None:
+        if self.client is not None and not self.manager.closing:
+            logger.warning(f"mcp_session_broken session={self.idx} reason={reason}")
+        self.client = None
+        if self._broken is not None:
+            self._broken.set()
+
+    async def run(self) -> None:
+        backoff = settings.RETRY_BASE_DELAY_SECONDS
+        while not self.manager.closing:
+            self._broken = asyncio.Event()
+            try:
+                async with Client(self.manager.target, timeout=settings.MCP_CALL_TIMEOUT_SECONDS) as client:
+                    self.client = client
+                    self.connected_at = time.time()
+                    backoff = settings.RETRY_BASE_DELAY_SECONDS
+                    self.manager._session_ready()
+                    logger.info(f"mcp_session_open session={self.idx} transport={self.manager.transport}")
+                    await self._broken.wait()
+            except Exception as e:
+                if not self.manager.closing:
+                    logger.warning(f"mcp_session_connect_failed session={self.idx}: {e}")
+            finally:
+                self.client = None
+
+            if self.manager.closing:
+                return
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+class MCPClientManager:
+    """
+    Pool of initialized MCP sessions on one background event loop.
+
+    Callers on any thread or loop submit coroutines to that loop: run() for
+    blocking code, arun()/acall() for async code. Calls go to the least
+    busy healthy session. Sessions are pinged every
+    MCP_HEALTH_INTERVAL_SECONDS, and a failed ping or transport error drops
+    the session so its task reconnects with backoff.
+
+    transport: "http" (target is the server URL), "memory" (target is the
+    FastMCP instance, in-memory MCP sessions) or "direct" (no sessions: the
+    tool functions of app.mcp.server are called on the MCP tool pool).
+    """
+
+    def __init__(self, target: Any, transport: str = "http", pool_size: int = 4) -> None:
+        if transport not in ("http", "memory", "direct"):
+            raise ValueError(f"Unknown MCP transport: {transport}")
+        self.target = target
+        self.transport = transport
+        self.pool_size = max(1, pool_size)
+        self.closing = False
+        self._sessions: List[_Session] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-client", daemon=True)
+        self._thread.start()
+        # not _submit(): the session tasks must not inherit the first caller's context
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    # --- cross-loop plumbing ---
+
+    def _submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule coro on the manager loop, in a copy of the caller's context (request stats)."""
+        ctx = contextvars.copy_context()
+        out: concurrent.futures.Future = concurrent.futures.Future()
+
+        def start() -> None:
+            task = self._loop.create_task(coro, context=ctx)
+
+            def finish(t: asyncio.Task) -> None:
+                if out.done():
+                    return
+                if t.cancelled():
+                    out.cancel()
+                elif t.exception() is not None:
+                    out.set_exception(t.exception())
+                else:
+                    out.set_result(t.result())
+
+            task.add_done_callback(finish)
+            # a caller that gave up (cancelled await) cancels the work too
+            out.add_done_callback(lambda f: f.cancelled() and self._loop.call_soon_threadsafe(task.cancel))
+
+        self._loop.call_soon_threadsafe(start)
+        return out
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Blocking facade: run coro on the manager loop and wait for it."""
+        if self._on_loop():
+            raise RuntimeError("MCPClientManager.run() called from its own loop; await arun() instead")
+        return self._submit(coro).result()
+
+    async def arun(self, coro: Awaitable[Any]) -> Any:
+        if self._on_loop():
+            return await coro
+        return await asyncio.wrap_future(self._submit(coro))
+
+    def _on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # --- sessions (manager loop only) ---
+
+    async def _start(self) -> None:
+        self._ready = asyncio.Event()
+        if self.transport == "direct":
+            return
+        self._sessions = [_Session(self, i) for i in range(self.pool_size)]
+        for s in self._sessions:
+            s.task = asyncio.create_task(s.run())
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    def _session_ready(self) -> None:
+        self._ready.set()
+
+    async def _pick(self) -> _Session:
+        deadline = time.monotonic() + settings.MCP_CONNECT_TIMEOUT_SECONDS
+        while True:
+            healthy = [s for s in self._sessions if s.healthy]
+            if healthy:
+                return min(healthy, key=lambda s: s.in_flight)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UpstreamNotConnectedError(f"no MCP session available ({self.transport})")
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call_direct(self, tool: str, args: Dict[str, Any]) -> Any:
+        from app.mcp.server import TOOLS
+
+        fn = TOOLS.get(tool)
+        if fn is None:
+            raise ToolError(f"Unknown tool: {tool}")
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            # the tools offload their blocking work to the tool pool themselves
+            result = await fn(**args)
+            ok = True
+            return result
+        except Exception as e:
+            # same error type a remote caller would see
+            raise ToolError(f"Error calling tool {tool!r}: {e}") from e
+        finally:
+            self._observe(tool, (time.perf_counter() - t0) * 1000, ok)
+
+    async def _call(self, tool: str, args: Dict[str, Any]) -> Any:
+        if self.transport == "direct":
+            return await self._call_direct(tool, args)
+
+        session = await self._pick()
+        session.in_flight += 1
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            result = _unwrap(await session.client.call_tool(tool, args))
+            ok = True
+            return result
+        except Exception as e:
+            err = as_retryable(e)
+            # a dead transport poisons the session; slow calls and tool errors don't
+            if err is not None and not isinstance(err, UpstreamTimeoutError):
+                session.mark_broken(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            session.in_flight -= 1
+            self._observe(tool, (time.perf_counter() - t0) * 1000, ok)
+
+    async def acall(self, tool: str, args: Dict[str, Any]) -> Any:
+        """Call a tool and return its plain (dict/list) result; usable from any loop."""
+        return await self.arun(self._call(tool, args))
+
+    async def _health_loop(self) -> None:
+        while not self.closing:
+            await asyncio.sleep(settings.MCP_HEALTH_INTERVAL_SECONDS)
+            for s in self._sessions:
+                client = s.client
+                if client is None or s.in_flight:
+                    # reconnecting, or busy (a call in flight is its own health check)
+                    continue
+                try:
+                    await asyncio.wait_for(client.ping(), timeout=settings.MCP_CONNECT_TIMEOUT_SECONDS)
+                except Exception as e:
+                    # any protocol-level answer (even "method not found") means the session is alive
+                    if isinstance(e, asyncio.TimeoutError) or as_retryable(e) is not None:
+                        s.mark_broken(f"ping failed: {type(e).__name__}: {e}")
+
+    async def _stop(self) -> None:
+        self.closing = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for s in self._sessions:
+            s.mark_broken("shutdown")
+        await asyncio.gather(*(s.task for s in self._sessions if s.task is not None), return_exceptions=True)
+
+    # --- stats / lifecycle ---
+
+    def _observe(self, tool: str, ms: float, ok: bool) -> None:
+        with self._lock:
+            hist = self._histograms.get(tool)
+            if hist is None:
+                hist = self._histograms[tool] = LatencyHistogram()
+            hist.observe(ms, ok)
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = [
+            {"session": s.idx, "healthy": s.healthy, "in_flight": s.in_flight, "reconnects": s.reconnects}
+            for s in self._sessions
+        ]
+        with self._lock:
+            tools = {name: h.stats() for name, h in self._histograms.items()}
+        return {
+            "transport": self.transport,
+            "target": self.target if isinstance(self.target, str) else type(self.target).__name__,
+            "healthy_sessions": sum(1 for s in sessions if s["healthy"]),
+            "sessions": sessions,
+            "tools": tools,
+        }
+
+    def close(self) -> None:
+        if self.closing:
+            return
+        try:
+            self._submit(self._stop()).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"mcp_client_manager stop failed: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+
+def _target():
+    if settings.MCP_TRANSPORT == "http":
+        return settings.MCP_URL
+    from app.mcp.server import mcp
+
+    return mcp
+
+
+def _manager_key() -> Tuple:
+    return ("mcp_client", settings.MCP_TRANSPORT, settings.MCP_URL if settings.MCP_TRANSPORT == "http" else "in-process")
+
+
+def get_mcp_manager() -> MCPClientManager:
+    from app.core.resources import registry
+
+    return registry.get_or_create(
+        _manager_key(),
+        lambda: MCPClientManager(_target(), settings.MCP_TRANSPORT, settings.MCP_POOL_SIZE),
+    )
+
+
+def mcp_client_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the running manager, if any; never starts one."""
+    from app.core.resources import registry
+
+    manager = registry.get(_manager_key())
+    if manager is None:
+        return None
+    stats = manager.stats()
+    if manager.transport != "http":
+        from app.mcp.server import server_stats
+
+        # the tool server runs in this process, so its side is visible too
+        stats["server"] = server_stats()
+    return stats
@@ -1,60 +1,78 @@
-import asyncio
 from typing import Any, Dict, List, Optional
 
-from fastmcp import Client
-
-MCP_URL = "http://127.0.0.1:8765/mcp"
+from app.core.hedging import get_hedge
+from app.core.retry import retry_on_transient_failure
+from app.core.retryable import UpstreamNotConnectedError
+from app.mcp.client_manager import get_mcp_manager
 
 
+@retry_on_transient_failure("mcp")
 async def _call_tool(tool: str, args: Dict[str, Any]) -> Any:
-    async with Client(MCP_URL) as client:
-        res = await client.call_tool(tool, args)
+    # idempotent tools only: any transient failure is retried.
+    # Plain dict/list results over every MCP_TRANSPORT
+    return await get_mcp_manager().acall(tool, args)
+
+
+@retry_on_transient_failure("mcp", retry_on=UpstreamNotConnectedError)
+async def _call_write_tool(tool: str, args: Dict[str, Any]) -> Any:
+    # A write may time out after the server committed it, and a replay would
+    # store the turn twice; it is only retried when it never left the client
+    return await get_mcp_manager().acall(tool, args)
 
-        # 1) unwrap result envelope
-        payload = None
-        if hasattr(res, "data"):
-            payload = res.data
-        elif hasattr(res, "content"):
-            payload = res.content
-        else:
-            payload = res
 
-        # 2) convert pydantic models -> dict/list
-        return _to_plain(payload)
+# safe to send twice: retried on any transient failure and may be hedged
+READ_TOOLS = {"memory_search", "docs_search"}
 
 
-def _to_plain(x: Any) -> Any:
-    # Pydantic v2
-    if hasattr(x, "model_dump"):
-        return x.model_dump()
-    # Pydantic v1
-    if hasattr(x, "dict"):
-        return x.dict()
+async def _call_read_tool(tool: str, args: Dict[str, Any]) -> Any:
+    # read-only tools are safe to send twice, so they may be hedged
+    return await get_hedge(tool).acall(lambda: _call_tool(tool, args))
 
-    if isinstance(x, list):
-        return [_to_plain(i) for i in x]
-    if isinstance(x, dict):
-        return {k: _to_plain(v) for k, v in x.items()}
 
-    return x
+def tool_call(tool: str, **args: Any) -> Dict[str, Any]:
+    """One entry of an MCPTools.batch() call."""
+    return {"tool": tool, "args": args}
 
 
 class MCPTools:
+    # Sync facade for threads: the call runs on the MCP client manager's
+    # loop. Async callers use the a* methods directly.
     def memory_search(self, user_id: str, query: str, top_k: int = 4) -> List[Dict[str, Any]]:
-        return asyncio.run(_call_tool("memory_search", {"user_id": user_id, "query": query, "top_k": top_k}))
+        return get_mcp_manager().run(self.amemory_search(user_id, query, top_k))
 
     def memory_add(self, user_id: str, session_id: str, question: str, answer: str) -> Dict[str, Any]:
-        return asyncio.run(
-            _call_tool(
-                "memory_add",
-                {"user_id": user_id, "session_id": session_id, "question": question, "answer": answer},
-            )
-        )
+        return get_mcp_manager().run(self.amemory_add(user_id, session_id, question, answer))
 
     def docs_search(self, query: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> List[Dict[str, Any]]:
-        return asyncio.run(
-            _call_tool(
-                "docs_search",
-                {"query": query, "top_k": top_k, "metadata_filter": metadata_filter},
-            )
-        )
\ No newline at end of file
+        return get_mcp_manager().run(self.adocs_search(query, top_k, metadata_filter))
+
+    def batch(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return get_mcp_manager().run(self.abatch(calls))
+
+    async def amemory_search(self, user_id: str, query: str, top_k: int = 4) -> List[Dict[str, Any]]:
+        return await _call_read_tool("memory_search", {"user_id": user_id, "query": query, "top_k": top_k})
+
+    async def amemory_add(self, user_id: str, session_id: str, question: str, answer: str) -> Dict[str, Any]:
+        return await _call_write_tool(
+            "memory_add",
+            {"user_id": user_id, "session_id": session_id, "question": question, "answer": answer},
+        )
+
+    async def adocs_search(self, query: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> List[Dict[str, Any]]:
+        return await _call_read_tool(
+            "docs_search",
+            {"query": query, "top_k": top_k, "metadata_filter": metadata_filter},
+        )
+
+    async def abatch(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # One round trip for several tool calls (see tool_call), run concurrently
+        # on the server. A failed call comes back as {"ok": False, "error": ...}
+        # in its slot instead of failing the whole batch. Only an all-read
+        # batch is hedged and retried like a read tool; one with a write is
+        # treated as a write.
+        if not calls:
+            return []
+        args = {"calls": list(calls)}
+        if all(c.get("tool") in READ_TOOLS for c in calls):
+            return await _call_read_tool("batch", args)
+        return await _call_write_tool("batch", args)
@@ -0,0 +1,194 @@
+import asyncio
+import atexit
+import contextvars
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.memory.service import ensure_memory_ready, get_memory_outbox, memory_outbox_stats
+from app.memory.service import remember_turn as remember_turn_local
+from app.memory.service import load_long_term as load_long_term_local
+from app.core.resources import close_resources, get_docs_store, get_memory_store_handle, get_mcp_tool_executor
+from app.core.settings import settings
+from app.mcp.client_manager import LatencyHistogram
+from app.retrieval.retriever import retrieve
+
+logger = logging.getLogger(__name__)
+
+mcp = FastMCP("SupportOps MCP")
+
+
+class ToolMetrics:
+    """
+    Per-tool latency (queue wait + run) and the tool pool's queue depth:
+    calls submitted to the executor that no thread has picked up yet.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+
+    def observe(self, tool: str, ms: float, ok: bool) -> None:
+        with self._lock:
+            hist = self._histograms.get(tool)
+            if hist is None:
+                hist = self._histograms[tool] = LatencyHistogram()
+            hist.observe(ms, ok)
+
+    async def run(self, tool: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking tool body on the tool pool, without holding up the server's event loop."""
+        started = [False]
+
+        def work():
+            with self._lock:
+                started[0] = True
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            call = functools.partial(contextvars.copy_context().run, work)
+            result = await asyncio.get_running_loop().run_in_executor(get_mcp_tool_executor(), call)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                # cancelled before a thread picked it up
+                if not started[0]:
+                    self.queued -= 1
+            self.observe(tool, (time.perf_counter() - t0) * 1000, ok)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": settings.MCP_TOOL_WORKERS,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "tools": {name: h.stats() for name, h in self._histograms.items()},
+            }
+
+
+tool_metrics = ToolMetrics()
+
+
+def _memory_search(user_id: str, query: str, top_k: int) -> List[Dict[str, Any]]:
+    ensure_memory_ready()
+    results = load_long_term_local(user_id, query)[:top_k]
+    return [{"text": x["text"], "metadata": x.get("metadata", {}), "score": x.get("score")} for x in results]
+
+
+def _memory_add(user_id: str, session_id: str, question: str, answer: str) -> Dict[str, Any]:
+    ensure_memory_ready()
+    remember_turn_local(user_id=user_id, session_id=session_id, question=question, answer=answer)
+    return {"status": "ok"}
+
+
+def _docs_search(query: str, top_k: int, metadata_filter: Optional[dict]) -> List[Dict[str, Any]]:
+    store = get_docs_store()
+    return retrieve(store, query, top_k=top_k, metadata_filter=metadata_filter)
+
+
+async def memory_search(user_id: str, query: str, top_k: int = 4) -> List[Dict[str, Any]]:
+    """Semantic search long-term memory for a user."""
+    return await tool_metrics.run("memory_search", _memory_search, user_id, query, top_k)
+
+
+async def memory_add(user_id: str, session_id: str, question: str, answer: str) -> Dict[str, Any]:
+    """Persist a turn to short-term (SQLite) + long-term (Chroma) memory."""
+    return await tool_metrics.run("memory_add", _memory_add, user_id, session_id, question, answer)
+
+
+async def docs_search(query: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> List[Dict[str, Any]]:
+    """Search your docs vector store (Chroma) and return chunks with metadata+score."""
+    return await tool_metrics.run("docs_search", _docs_search, query, top_k, metadata_filter)
+
+
+# tools that may appear inside a batch
+BATCHABLE = {fn.__name__: fn for fn in (memory_search, memory_add, docs_search)}
+
+
+async def _run_batch_item(call: Dict[str, Any]) -> Dict[str, Any]:
+    tool = call.get("tool")
+    fn = BATCHABLE.get(tool)
+    if fn is None:
+        return {"tool": tool, "ok": False, "error": f"Unknown or non-batchable tool: {tool}"}
+    try:
+        result = await fn(**(call.get("args") or {}))
+    except Exception as e:
+        return {"tool": tool, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    return {"tool": tool, "ok": True, "result": result}
+
+
+async def batch(calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run several tool calls concurrently in one round trip. Each call is
+    {"tool": name, "args": {...}}; results come back in the same order as
+    {"tool", "ok": true, "result"} or {"tool", "ok": false, "error"}.
+    """
+    if len(calls) > settings.MCP_BATCH_MAX_CALLS:
+        raise ValueError(f"batch of {len(calls)} calls exceeds MCP_BATCH_MAX_CALLS={settings.MCP_BATCH_MAX_CALLS}")
+    t0 = time.perf_counter()
+    results = list(await asyncio.gather(*(_run_batch_item(c) for c in calls)))
+    tool_metrics.observe("batch", (time.perf_counter() - t0) * 1000, True)
+    return results
+
+
+# The tool functions double as the MCP_TRANSPORT=direct dispatch table, so
+# in-process and remote callers get the exact same tool contract.
+TOOLS = {**BATCHABLE, "batch": batch}
+for _fn in TOOLS.values():
+    mcp.tool()(_fn)
+
+
+def server_stats() -> Dict[str, Any]:
+    return {**tool_metrics.stats(), "memory_outbox": memory_outbox_stats()}
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def stats_route(request: Request) -> JSONResponse:
+    return JSONResponse(server_stats())
+
+
+def open_tool_resources() -> None:
+    """Build the SQLite schema, stores, embedder, tool pool and memory outbox once, before the first call."""
+    ensure_memory_ready()
+    get_docs_store()
+    get_memory_store_handle()
+    get_mcp_tool_executor()
+    if settings.MEMORY_WRITE_BEHIND:
+        # starts draining turns a previous run left in the outbox
+        get_memory_outbox()
+
+
+def create_http_app():
+    """
+    ASGI app factory for uvicorn. Serve it from one process: the stores are
+    local Chroma PersistentClients, and a second process would keep its own
+    index over the same files (missing the other's writes, and able to
+    corrupt them). MCP_TOOL_WORKERS scales the concurrency within it.
+    """
+    open_tool_resources()
+    # uvicorn gives the factory no shutdown hook; this drains the memory outbox on exit
+    atexit.register(close_resources)
+    logger.info(f"mcp_server_ready tool_workers={settings.MCP_TOOL_WORKERS}")
+    return mcp.http_app(path="/mcp")
@@ -0,0 +1,283 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.circuit import as_retryable
+from app.core.errors import CircuitOpenError
+from app.core.limiter import use_priority
+from app.core.settings import settings
+from app.memory.store import insert_message
+
+logger = logging.getLogger(__name__)
+
+_TURN_FIELDS = ("user_id", "session_id", "question", "answer")
+
+
+class MemoryOutbox:
+    """
+    Write-behind queue for the long-term half of remember_turn.
+
+    enqueue() commits the short-term messages and an outbox row in one SQLite
+    transaction, so the session's history is readable at once and the turn
+    survives a restart. A worker thread claims pending rows in batches and
+    hands them to `write_turns` (one embedding + add_texts call per batch);
+    rows are deleted only after that succeeds. Memory ids are deterministic,
+    so a replayed batch is an upsert, not a duplicate. A turn the upstream
+    rejects is isolated by bisecting its batch and charged an attempt; after
+    MEMORY_OUTBOX_MAX_ATTEMPTS it stays in the table as dead. Transient
+    errors charge nobody.
+
+    Backpressure: past MEMORY_OUTBOX_MAX_PENDING turns enqueue() waits up to
+    MEMORY_OUTBOX_BLOCK_SECONDS for the worker; if the backlog is still full
+    it returns False and the caller writes long-term memory itself.
+    """
+
+    def __init__(self, db_path: str, write_turns: Callable[[List[Dict[str, Any]]], None]) -> None:
+        self.db_path = db_path
+        self.write_turns = write_turns
+        self.max_pending = settings.MEMORY_OUTBOX_MAX_PENDING
+        self.batch_turns = settings.MEMORY_OUTBOX_BATCH_TURNS
+        self.flush_s = settings.MEMORY_OUTBOX_FLUSH_MS / 1000
+        self.lease_s = settings.MEMORY_OUTBOX_LEASE_SECONDS
+        self.max_attempts = settings.MEMORY_OUTBOX_MAX_ATTEMPTS
+        self._cond = threading.Condition()
+        self._closing = False
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflow = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+        conn = self._connect()
+        try:
+            # readers and the worker don't block each other under WAL
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memory_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                )
+                """
+            )
+            conn.commit()
+            # turns left over from a previous run are drained first
+            self._pending = self._count_pending(conn)
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._run, name="memory-outbox", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _count_pending(self, conn: sqlite3.Connection) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM memory_outbox WHERE attempts < ?", (self.max_attempts,)
+        ).fetchone()[0]
+
+    def enqueue(self, user_id: str, session_id: str, question: str, answer: str) -> bool:
+        """
+        Commit the turn's short-term messages, plus an outbox row when there
+        is room. Returns False when the long-term write was not queued.
+        """
+        deadline = time.monotonic() + settings.MEMORY_OUTBOX_BLOCK_SECONDS
+        with self._cond:
+            while self._pending >= self.max_pending and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            accepted = self._pending < self.max_pending and not self._closing
+            if accepted:
+                # reserve the slot before writing, so concurrent callers can't overshoot
+                self._pending += 1
+            else:
+                self.overflow += 1
+
+        conn = self._connect()
+        try:
+            with conn:
+                insert_message(conn, session_id, "user", question)
+                insert_message(conn, session_id, "assistant", answer)
+                if accepted:
+                    conn.execute(
+                        "INSERT INTO memory_outbox(user_id, session_id, question, answer, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user_id, session_id, question, answer, time.time()),
+                    )
+        except Exception:
+            if accepted:
+                with self._cond:
+                    self._pending -= 1
+            raise
+        finally:
+            conn.close()
+
+        with self._cond:
+            if accepted:
+                self.enqueued += 1
+                self._cond.notify_all()
+        if not accepted:
+            logger.warning(f"memory_outbox_full pending={self._pending} max={self.max_pending}")
+        return accepted
+
+    def _drain_batch(self) -> int:
+        """Claim, write and delete up to one batch of turns; returns how many were written."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                # expired claims belong to a worker that died mid-batch
+                conn.execute(
+                    "UPDATE memory_outbox SET claimed_by = ?, claimed_at = ? WHERE id IN ("
+                    "SELECT id FROM memory_outbox WHERE attempts < ? AND (claimed_at IS NULL OR claimed_at < ?) "
+                    "ORDER BY id LIMIT ?)",
+                    (token, now, self.max_attempts, now - self.lease_s, self.batch_turns),
+                )
+            rows = conn.execute(
+                f"SELECT id, {', '.join(_TURN_FIELDS)} FROM memory_outbox WHERE claimed_by = ? ORDER BY id",
+                (token,),
+            ).fetchall()
+
+            written: List[int] = []
+            error: Optional[BaseException] = None
+            if rows:
+                written, poisoned, error = self._write(rows)
+                with conn:
+                    conn.executemany("DELETE FROM memory_outbox WHERE id = ?", [(i,) for i in written])
+                    conn.executemany(
+                        "UPDATE memory_outbox SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in poisoned]
+                    )
+                    # whatever is left goes back to the queue
+                    conn.execute(
+                        "UPDATE memory_outbox SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?", (token,)
+                    )
+
+            pending = self._count_pending(conn)
+        finally:
+            conn.close()
+
+        with self._cond:
+            self._pending = pending
+            if written:
+                self.batches += 1
+                self.written += len(written)
+            # wake enqueuers waiting for room
+            self._cond.notify_all()
+        if written:
+            logger.info(f"memory_outbox_written turns={len(written)} pending={pending}")
+        if error is not None:
+            raise error
+        return len(written)
+
+    def _write(self, rows: List[tuple]) -> Tuple[List[int], List[int], Optional[BaseException]]:
+        """
+        Write (id, *turn) rows. Returns the ids written, the ids whose own
+        content was rejected, and the transient error that stopped the rest.
+        """
+        try:
+            self.write_turns([dict(zip(_TURN_FIELDS, r[1:])) for r in rows])
+            return [r[0] for r in rows], [], None
+        except Exception as e:
+            if isinstance(e, CircuitOpenError) or as_retryable(e) is not None:
+                # the upstream's state, not the turns': nobody is charged an attempt
+                return [], [], e
+            if len(rows) == 1:
+                with self._cond:
+                    self.failures += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"memory_outbox_turn_failed id={rows[0][0]} error={e}")
+                return [], [rows[0][0]], None
+
+        # rejected for its content: bisect so only the offending turn is charged
+        mid = len(rows) // 2
+        written, poisoned, error = self._write(rows[:mid])
+        if error is not None:
+            return written, poisoned, error
+        more_written, more_poisoned, error = self._write(rows[mid:])
+        return written + more_written, poisoned + more_poisoned, error
+
+    def _run(self) -> None:
+        backoff = 0.0
+        with use_priority("background"):
+            while True:
+                with self._cond:
+                    if not self._closing and not self._pending:
+                        # idle until the next enqueue; every lease period, look for expired claims
+                        self._cond.wait(self.lease_s)
+                    if not self._closing and self._pending < self.batch_turns:
+                        # a full batch goes at once; a partial one waits up to flush_s to fill
+                        self._cond.wait_for(lambda: self._closing or self._pending >= self.batch_turns, timeout=self.flush_s)
+                    if self._closing:
+                        return
+                try:
+                    self._drain_batch()
+                    backoff = 0.0
+                except Exception as e:
+                    backoff = min(backoff * 2 or 1.0, 30.0)
+                    with self._cond:
+                        self.failures += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                        logger.warning(f"memory_outbox_write_failed error={e} retry_in_s={backoff}")
+                        self._cond.wait_for(lambda: self._closing, timeout=backoff)
+
+    def flush(self, timeout_s: float) -> int:
+        """Drain on the calling thread until empty or `timeout_s`; returns the turns still pending."""
+        deadline = time.monotonic() + timeout_s
+        with use_priority("background"):
+            while time.monotonic() < deadline:
+                try:
+                    if self._drain_batch() == 0:
+                        break
+                except Exception as e:
+                    logger.warning(f"memory_outbox_flush_failed error={e}")
+                    break
+        return self._pending
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout=settings.MEMORY_OUTBOX_SHUTDOWN_SECONDS)
+        left = self.flush(settings.MEMORY_OUTBOX_SHUTDOWN_SECONDS)
+        if left:
+            # still in the table; the next start picks them up
+            logger.warning(f"memory_outbox_closed pending={left}")
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        try:
+            dead = conn.execute(
+                "SELECT COUNT(*) FROM memory_outbox WHERE attempts >= ?", (self.max_attempts,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        with self._cond:
+            return {
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+                "overflow": self.overflow,
+                "failures": self.failures,
+                "dead": dead,
+                "last_error": self.last_error,
+            }
@@ -1,16 +1,27 @@
 import hashlib
-from typing import Dict, List
+import threading
+from typing import Any, Dict, List, Optional
 
 from app.core.settings import settings
 from app.memory.store import init_db, add_message, get_recent_messages
-from app.memory.vector import get_memory_store, add_memory_texts, search_memories
+from app.core.resources import get_memory_store_handle, registry
+from app.memory.outbox import MemoryOutbox
+from app.memory.vector import add_memory_texts, search_memories
 
-# Reuse the same persist dir you use for your Chroma doc store
-PERSIST_DIR = "data/vector_store"
+
+_ready_dbs: set = set()
+_ready_lock = threading.Lock()
 
 
 def ensure_memory_ready() -> None:
-    init_db(settings.MEMORY_DB_PATH)
+    # CREATE TABLE/INDEX once per process and db path, not on every call
+    db_path = settings.MEMORY_DB_PATH
+    if db_path in _ready_dbs:
+        return
+    with _ready_lock:
+        if db_path not in _ready_dbs:
+            init_db(db_path)
+            _ready_dbs.add(db_path)
 
 
 def _make_id(user_id: str, role: str, content: str) -> str:
@@ -29,7 +40,7 @@ def load_short_term(session_id: str) -> List[Dict]:
 # Long-term memory (user-scoped)
 # -------------------------
 def load_long_term(user_id: str, question: str) -> List[Dict]:
-    store = get_memory_store(PERSIST_DIR, settings.MEMORY_COLLECTION)
+    store = get_memory_store_handle()
     return search_memories(
         store,
         query=question,
@@ -41,20 +52,55 @@ def load_long_term(user_id: str, question: str) -> List[Dict]:
 # -------------------------
 # Persist both stores
 # -------------------------
+def _write_long_term(turns: List[Dict[str, Any]]) -> None:
+    """Embed and upsert many turns with one add_texts call (one embedding request per batch)."""
+    # keyed by id: the same text twice in one batch would be a duplicate id for Chroma
+    memories: Dict[str, tuple] = {}
+    for t in turns:
+        for role, content in (("user", t["question"]), ("assistant", t["answer"])):
+            meta = {"user_id": t["user_id"], "session_id": t["session_id"], "role": role, "type": "chat"}
+            memories[_make_id(t["user_id"], role, content)] = (content, meta)
+
+    store = get_memory_store_handle()
+    add_memory_texts(
+        store,
+        texts=[text for text, _ in memories.values()],
+        metadatas=[meta for _, meta in memories.values()],
+        ids=list(memories),
+    )
+
+
+def _open_outbox() -> MemoryOutbox:
+    ensure_memory_ready()
+    # opened before the outbox so it is still open while the outbox drains on shutdown
+    get_memory_store_handle()
+    return MemoryOutbox(settings.MEMORY_DB_PATH, write_turns=_write_long_term)
+
+
+def get_memory_outbox() -> MemoryOutbox:
+    return registry.get_or_create(("memory_outbox", settings.MEMORY_DB_PATH), _open_outbox)
+
+
+def memory_outbox_stats() -> Optional[Dict[str, Any]]:
+    outbox = registry.get(("memory_outbox", settings.MEMORY_DB_PATH))
+    return outbox.stats() if outbox is not None else None
+
+
 def remember_turn(user_id: str, session_id: str, question: str, answer: str) -> None:
+    turn = {"user_id": user_id, "session_id": session_id, "question": question, "answer": answer}
+
+    if settings.MEMORY_WRITE_BEHIND:
+        # short-term rows are committed before this returns (read-your-writes
+        # for the session); long-term embedding happens in the background
+        if get_memory_outbox().enqueue(user_id, session_id, question, answer):
+            return
+        # backlog full: this caller pays for its own long-term write
+        _write_long_term([turn])
+        return
+
     # short-term: store raw messages per session
     add_message(settings.MEMORY_DB_PATH, session_id, "user", question)
     add_message(settings.MEMORY_DB_PATH, session_id, "assistant", answer)
 
     # long-term: store semantic memories per user
-    store = get_memory_store(PERSIST_DIR, settings.MEMORY_COLLECTION)
-
-    uid = _make_id(user_id, "user", question)
-    aid = _make_id(user_id, "assistant", answer)
-
-    texts = [question, answer]
-    metadatas = [
-        {"user_id": user_id, "session_id": session_id, "role": "user", "type": "chat"},
-        {"user_id": user_id, "session_id": session_id, "role": "assistant", "type": "chat"},
-    ]
-    add_memory_texts(store, texts=texts, metadatas=metadatas, ids=[uid, aid])
\ No newline at end of file
+    _write_long_term([turn])
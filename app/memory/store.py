@@ -26,13 +26,18 @@ def init_db(db_path: str) -> None:
         conn.close()
 
 
+def insert_message(conn: sqlite3.Connection, session_id: str, role: str, content: str) -> None:
+    # no commit: lets callers put several writes in one transaction
+    conn.execute(
+        "INSERT INTO messages(session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+        (session_id, role, content, int(time.time())),
+    )
+
+
 def add_message(db_path: str, session_id: str, role: str, content: str) -> None:
     conn = sqlite3.connect(db_path)
     try:
-        conn.execute(
-            "INSERT INTO messages(session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
-            (session_id, role, content, int(time.time())),
-        )
+        insert_message(conn, session_id, role, content)
         conn.commit()
     finally:
         conn.close()
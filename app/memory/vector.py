@@ -1,13 +1,13 @@
 from typing import List, Dict, Optional
 from langchain_chroma import Chroma
-from app.ingest.embedder import get_embedder  
+from app.ingest.embedder import get_embedder
 
 
-def get_memory_store(persist_dir: str, collection_name: str) -> Chroma:
+def get_memory_store(persist_dir: str, collection_name: str, embedding=None) -> Chroma:
     return Chroma(
         collection_name=collection_name,
         persist_directory=persist_dir,
-        embedding_function=get_embedder(),
+        embedding_function=embedding or get_embedder(),
     )
 
 
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.request_stats import attach_request_stats, record
+from app.core.resources import get_answer_cache_handle, run_on_search_executor
+from app.core.settings import settings
+from app.ingest.embedding_cache import normalize_text
+from app.retrieval.vector_store import collection_version
+
+logger = logging.getLogger(__name__)
+
+
+def filter_key(metadata_filter: Optional[dict]) -> str:
+    return hashlib.sha1(json.dumps(metadata_filter or {}, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class CacheProbe:
+    """Result of a lookup; passed back to save() so the entry is filed under the version it was answered from."""
+
+    endpoint: str
+    question: str
+    top_k: int
+    filter_key: str
+    index_version: int
+    hit: Optional[Dict[str, Any]] = None
+    elapsed_ms: int = 0
+
+
+class SemanticAnswerCache:
+    """
+    Past (question -> answer, citations) pairs in a dedicated cosine Chroma
+    collection. A lookup only matches entries with the same endpoint,
+    metadata_filter, top_k and docs index version, and needs cosine
+    similarity >= threshold. Entries from older index versions are purged
+    the first time a newer version is seen.
+    """
+
+    def __init__(self, store, docs_store, threshold: float = 0.95) -> None:
+        self.store = store
+        self.docs_store = docs_store
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._purged_version: Optional[int] = None
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def _purge_stale(self, version: int) -> None:
+        with self._lock:
+            if self._purged_version == version:
+                return
+            self._purged_version = version
+        try:
+            self.store._collection.delete(where={"index_version": {"$ne": version}})
+            logger.info(f"answer_cache purged entries older than index_version={version}")
+        except Exception as e:
+            logger.warning(f"answer_cache purge failed: {e}")
+
+    def _count(self, endpoint: str, hit: bool) -> None:
+        with self._lock:
+            bucket = self.hits if hit else self.misses
+            bucket[endpoint] = bucket.get(endpoint, 0) + 1
+        record("answer_cache", "hits" if hit else "misses")
+
+    def lookup(self, endpoint: str, question: str, top_k: int, metadata_filter: Optional[dict]) -> CacheProbe:
+        t0 = time.perf_counter()
+        version = collection_version(self.docs_store)
+        self._purge_stale(version)
+
+        probe = CacheProbe(endpoint, normalize_text(question), top_k, filter_key(metadata_filter), version)
+        where = {
+            "$and": [
+                {"endpoint": endpoint},
+                {"filter_key": probe.filter_key},
+                {"top_k": top_k},
+                {"index_version": version},
+            ]
+        }
+        try:
+            results = self.store.similarity_search_with_score(probe.question, k=1, filter=where)
+        except Exception as e:
+            # an unavailable cache must never fail the request
+            logger.warning(f"answer_cache lookup failed: {e}")
+            results = []
+
+        if results:
+            doc, distance = results[0]
+            similarity = 1.0 - float(distance)
+            if similarity >= self.threshold:
+                probe.hit = {
+                    "answer": doc.metadata["answer"],
+                    "citations": json.loads(doc.metadata["citations"]),
+                    "cached_question": doc.page_content,
+                    "similarity": round(similarity, 4),
+                }
+
+        probe.elapsed_ms = int((time.perf_counter() - t0) * 1000)
+        self._count(endpoint, probe.hit is not None)
+        return probe
+
+    def save(self, probe: CacheProbe, answer: str, citations: List[Dict[str, Any]]) -> None:
+        # Abstentions / uncited answers are cheap to recompute and not worth pinning
+        if probe.hit is not None or not answer or not citations:
+            return
+        entry_id = hashlib.sha256(
+            f"{probe.endpoint}\x00{probe.filter_key}\x00{probe.top_k}\x00{probe.index_version}\x00{probe.question}".encode("utf-8")
+        ).hexdigest()
+        metadata = {
+            "endpoint": probe.endpoint,
+            "filter_key": probe.filter_key,
+            "top_k": probe.top_k,
+            "index_version": probe.index_version,
+            "answer": answer,
+            "citations": json.dumps(citations),
+            "created_at": int(time.time()),
+        }
+        try:
+            self.store.add_texts(texts=[probe.question], metadatas=[metadata], ids=[entry_id])
+        except Exception as e:
+            logger.warning(f"answer_cache store failed: {e}")
+
+    async def alookup(self, endpoint: str, question: str, top_k: int, metadata_filter: Optional[dict]) -> CacheProbe:
+        return await run_on_search_executor(self.lookup, endpoint, question, top_k, metadata_filter)
+
+    async def asave(self, probe: CacheProbe, answer: str, citations: List[Dict[str, Any]]) -> None:
+        await run_on_search_executor(self.save, probe, answer, citations)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "endpoints": sorted(_enabled_endpoints()),
+                "threshold": self.threshold,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "by_endpoint": {e: {"hits": self.hits.get(e, 0), "misses": self.misses.get(e, 0)} for e in sorted(set(self.hits) | set(self.misses))},
+            }
+
+
+def _enabled_endpoints() -> set:
+    return {e.strip() for e in settings.ANSWER_CACHE_ENDPOINTS.split(",") if e.strip()}
+
+
+def get_answer_cache(endpoint: Optional[str] = None) -> Optional[SemanticAnswerCache]:
+    """The process-wide cache, or None when `endpoint` has not opted in (None: any endpoint)."""
+    enabled = _enabled_endpoints()
+    if not enabled or (endpoint is not None and endpoint not in enabled):
+        return None
+    return get_answer_cache_handle()
+
+
+def cached_stats(probe: CacheProbe, total_ms: int) -> Dict[str, Any]:
+    return {
+        "retrieved": len(probe.hit["citations"]),
+        "latency_ms": {"answer_cache": probe.elapsed_ms, "total": total_ms},
+        "tokens": {},
+        "cache": {"source": "answer_cache", "similarity": probe.hit["similarity"]},
+    }
+
+
+def cached_events(probe: CacheProbe, t0: float) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """The SSE event sequence for a hit: citations, the whole answer as one token, done."""
+    yield "citations", {"citations": probe.hit["citations"], "retrieved": len(probe.hit["citations"])}
+    yield "token", {"text": probe.hit["answer"]}
+    total_ms = int((time.perf_counter() - t0) * 1000)
+    stats = cached_stats(probe, total_ms)
+    stats["time_to_first_token_ms"] = total_ms
+    attach_request_stats(stats)
+    yield "done", {"answer": probe.hit["answer"], "stats": stats}
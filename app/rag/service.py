@@ -1,59 +1,35 @@
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
-from app.retrieval.vector_store import get_vector_store
-from app.retrieval.retriever import retrieve
+from app.core.resources import get_docs_store
+from app.retrieval.retriever import aretrieve, retrieve
 from app.llm.client import get_chat_model
+from app.llm.cache import ainvoke_cached, invoke_cached
 from app.rag.prompting import build_context, build_messages
+from app.rag.streaming import LLMStream, citations_from_chunks
 
 logger = logging.getLogger(__name__)
 
-PERSIST_DIR = "data/vector_store"
 
-
-def answer_question(question: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> Dict[str, Any]:
-    t0 = time.perf_counter()
-
-    store = get_vector_store(PERSIST_DIR)
-
-    t1 = time.perf_counter()
-    chunks = retrieve(
-        store,
-        question,
-        top_k=top_k,
-        metadata_filter=metadata_filter,
-    )
-    t2 = time.perf_counter()
-
-    # If retrieval is empty, fail gracefully
-    if not chunks:
-        return {
-            "answer": "I don't know based on the provided documents.",
-            "citations": [],
-            "stats": {
-                "retrieved": 0,
-                "latency_ms": {
-                    "vector_store_init": int((t1 - t0) * 1000),
-                    "retrieval": int((t2 - t1) * 1000),
-                    "llm": 0,
-                    "total": int((time.perf_counter() - t0) * 1000),
-                },
-                "tokens": {},
+def _empty_result(t0: float, t1: float, t2: float) -> Dict[str, Any]:
+    return {
+        "answer": "I don't know based on the provided documents.",
+        "citations": [],
+        "stats": {
+            "retrieved": 0,
+            "latency_ms": {
+                "vector_store_init": int((t1 - t0) * 1000),
+                "retrieval": int((t2 - t1) * 1000),
+                "llm": 0,
+                "total": int((time.perf_counter() - t0) * 1000),
             },
-        }
-
-    context = build_context(chunks)
-    messages = build_messages(question, context)
-
-    llm = get_chat_model()
-    t3 = time.perf_counter()
-
-    # LangChain returns an AIMessage; usage metadata depends on provider/version.
-    result = llm.invoke(messages)
+            "tokens": {},
+        },
+    }
 
-    t4 = time.perf_counter()
 
+def _build_result(result, chunks: list, t0: float, t1: float, t2: float, t3: float, t4: float) -> Dict[str, Any]:
     # Extract token usage if present
     usage = {}
     try:
@@ -95,4 +71,115 @@ def answer_question(question: str, top_k: int = 4, metadata_filter: Optional[dic
         "answer": result.content,
         "citations": citations,
         "stats": stats,
-    }
\ No newline at end of file
+    }
+
+
+def answer_question(question: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+
+    store = get_docs_store()
+
+    t1 = time.perf_counter()
+    chunks = retrieve(
+        store,
+        question,
+        top_k=top_k,
+        metadata_filter=metadata_filter,
+    )
+    t2 = time.perf_counter()
+
+    # If retrieval is empty, fail gracefully
+    if not chunks:
+        return _empty_result(t0, t1, t2)
+
+    context = build_context(chunks)
+    messages = build_messages(question, context)
+
+    llm = get_chat_model("answerer")
+    t3 = time.perf_counter()
+
+    # LangChain returns an AIMessage; usage metadata depends on provider/version.
+    result = invoke_cached(llm, messages, "answer")
+
+    t4 = time.perf_counter()
+    return _build_result(result, chunks, t0, t1, t2, t3, t4)
+
+
+async def aanswer_question(question: str, top_k: int = 4, metadata_filter: Optional[dict] = None) -> Dict[str, Any]:
+    """Same as answer_question, without holding a thread across the LLM round trip."""
+    t0 = time.perf_counter()
+
+    store = get_docs_store()
+
+    t1 = time.perf_counter()
+    chunks = await aretrieve(
+        store,
+        question,
+        top_k=top_k,
+        metadata_filter=metadata_filter,
+    )
+    t2 = time.perf_counter()
+
+    if not chunks:
+        return _empty_result(t0, t1, t2)
+
+    context = build_context(chunks)
+    messages = build_messages(question, context)
+
+    llm = get_chat_model("answerer")
+    t3 = time.perf_counter()
+    result = await ainvoke_cached(llm, messages, "answer")
+    t4 = time.perf_counter()
+    return _build_result(result, chunks, t0, t1, t2, t3, t4)
+
+
+async def astream_answer_question(
+    question: str, top_k: int = 4, metadata_filter: Optional[dict] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming answer_question: yields ("citations", ...) once retrieval is
+    done, then ("token", {"text"}) per delta, then ("done", {"answer", "stats"}).
+    """
+    t0 = time.perf_counter()
+
+    store = get_docs_store()
+
+    t1 = time.perf_counter()
+    chunks = await aretrieve(
+        store,
+        question,
+        top_k=top_k,
+        metadata_filter=metadata_filter,
+    )
+    t2 = time.perf_counter()
+
+    if not chunks:
+        out = _empty_result(t0, t1, t2)
+        yield "citations", {"citations": [], "retrieved": 0}
+        yield "done", {"answer": out["answer"], "stats": out["stats"]}
+        return
+
+    yield "citations", {"citations": citations_from_chunks(chunks), "retrieved": len(chunks)}
+
+    messages = build_messages(question, build_context(chunks))
+    stream = LLMStream(get_chat_model("answerer"), messages)
+    async for text in stream:
+        yield "token", {"text": text}
+
+    t4 = time.perf_counter()
+    stats = {
+        "retrieved": len(chunks),
+        "latency_ms": {
+            "vector_store_init": int((t1 - t0) * 1000),
+            "retrieval": int((t2 - t1) * 1000),
+            "llm": int((t4 - stream.started_at) * 1000),
+            "total": int((t4 - t0) * 1000),
+        },
+        "tokens": stream.usage or {},
+        **stream.rate_stats(t0),
+    }
+    logger.info(
+        "rag_answer_streamed",
+        extra={"retrieved": stats["retrieved"], "latency_ms": stats["latency_ms"], "tokens": stats["tokens"]},
+    )
+    yield "done", {"answer": stream.answer, "stats": stats}
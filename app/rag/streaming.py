@@ -0,0 +1,92 @@
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.circuit import get_upstream
+from app.core.limiter import get_limiter
+from app.llm.client import estimate_chat_tokens
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def citations_from_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": c.get("metadata", {}).get("id"),
+            "source": c.get("metadata", {}).get("source"),
+            "score": c.get("score"),
+        }
+        for c in chunks
+    ]
+
+
+class LLMStream:
+    """
+    Async iterator over answer deltas from `llm.astream`. Once exhausted it
+    holds the full answer, token usage and first/last token timestamps.
+    """
+
+    def __init__(self, llm, messages: list) -> None:
+        self.llm = llm
+        self.messages = messages
+        self.answer = ""
+        self.usage: Optional[Dict[str, int]] = None
+        self.started_at = 0.0
+        self.first_token_at: Optional[float] = None
+        self.finished_at = 0.0
+        self._deltas = 0
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        self.started_at = time.perf_counter()
+        parts: List[str] = []
+        # Streams are not retried (tokens may already be out), but they pass
+        # and feed the "chat" circuit breaker like any other chat call
+        upstream = get_upstream("chat")
+        upstream.breaker.before()
+        try:
+            # no latency_key: a stream lasts as long as the client keeps reading,
+            # which says nothing about upstream latency
+            async with get_limiter("chat").slot(estimate_chat_tokens(self.llm, self.messages)) as slot:
+                async for text in self._deltas_from_llm(parts):
+                    yield text
+                slot.used((self.usage or {}).get("total_tokens"))
+        except Exception as e:
+            err = upstream.on_error(e)
+            if err is None or err is e:
+                raise
+            raise err from e
+        upstream.breaker.on_success()
+        self.finished_at = time.perf_counter()
+        self.answer = "".join(parts)
+
+    async def _deltas_from_llm(self, parts: List[str]) -> AsyncIterator[str]:
+        # stream_usage: OpenAI only reports token usage on a stream when asked to
+        async for chunk in self.llm.astream(self.messages, stream_usage=True):
+            um = getattr(chunk, "usage_metadata", None)
+            if um:
+                self.usage = {
+                    "prompt_tokens": um.get("input_tokens", 0),
+                    "completion_tokens": um.get("output_tokens", 0),
+                    "total_tokens": um.get("total_tokens", 0),
+                }
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if not text:
+                continue
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self._deltas += 1
+            parts.append(text)
+            yield text
+
+    def rate_stats(self, t0: float) -> Dict[str, Any]:
+        """time_to_first_token_ms is measured from t0 (request start), tokens/s over the generation phase."""
+        if self.first_token_at is None:
+            return {"time_to_first_token_ms": None, "tokens_per_s": 0.0}
+        tokens = (self.usage or {}).get("completion_tokens") or self._deltas
+        gen_s = self.finished_at - self.first_token_at
+        return {
+            "time_to_first_token_ms": int((self.first_token_at - t0) * 1000),
+            "tokens_per_s": round(tokens / gen_s, 1) if gen_s > 0 else 0.0,
+        }
@@ -0,0 +1,94 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.request_stats import record
+from app.core.settings import settings
+from app.ingest.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def retrieval_key(query: str, top_k: int, metadata_filter: Optional[dict], dedupe_by_source: bool) -> Tuple:
+    return (
+        normalize_text(query),
+        top_k,
+        json.dumps(metadata_filter or {}, sort_keys=True),
+        bool(dedupe_by_source),
+    )
+
+
+class RetrievalCache:
+    """
+    In-process LRU of retrieve() results, per collection. Each collection's
+    entries are tagged with the collection version they were computed at;
+    seeing a newer version (any add/delete, from any process) drops them.
+    """
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._versions: Dict[Tuple, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync_version(self, collection: Tuple, version: int) -> None:
+        # caller holds the lock
+        seen = self._versions.get(collection)
+        if seen == version:
+            return
+        if seen is not None:
+            stale = [k for k in self._lru if k[0] == collection]
+            for k in stale:
+                del self._lru[k]
+            self.invalidations += 1
+            logger.info(f"retrieval_cache invalidated collection={collection[1]} version={seen}->{version} dropped={len(stale)}")
+        self._versions[collection] = version
+
+    def get(self, collection: Tuple, version: int, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            self._sync_version(collection, version)
+            chunks = self._lru.get((collection, key))
+            if chunks is None:
+                self.misses += 1
+            else:
+                self._lru.move_to_end((collection, key))
+                self.hits += 1
+        record("retrieval_cache", "hits" if chunks is not None else "misses")
+        # callers may annotate chunks; hand out copies
+        return [dict(c) for c in chunks] if chunks is not None else None
+
+    def put(self, collection: Tuple, version: int, key: Tuple, chunks: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            # a write landed while we were searching: the result may predate it
+            if self._versions.get(collection) != version:
+                return
+            self._lru[(collection, key)] = [dict(c) for c in chunks]
+            self._lru.move_to_end((collection, key))
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "invalidations": self.invalidations,
+                "versions": {c[1]: v for c, v in self._versions.items()},
+            }
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    from app.core.resources import registry
+
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return None
+    return registry.get_or_create(("retrieval_cache",), lambda: RetrievalCache(settings.RETRIEVAL_CACHE_MAX_ENTRIES))
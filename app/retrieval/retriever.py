@@ -1,6 +1,9 @@
 import logging
 from typing import List, Dict, Any, Optional
 
+from app.retrieval.cache import get_retrieval_cache, retrieval_key
+from app.retrieval.vector_store import collection_id, collection_version
+
 logger = logging.getLogger(__name__)
 
 
@@ -9,8 +12,26 @@ def retrieve(store,query: str,top_k: int = 4,metadata_filter: Optional[dict] = N
     Retrieves top_k chunks using similarity search.
     - metadata_filter is enforced at the vector DB layer when supported.
     - dedupe_by_source prevents multiple chunks from the same file dominating results.
+    - results are cached per collection version (see app.retrieval.cache).
     """
+    cache = get_retrieval_cache()
+    if cache is None:
+        return _search(store, query, top_k, metadata_filter, dedupe_by_source)
+
+    collection = collection_id(store)
+    version = collection_version(store)
+    key = retrieval_key(query, top_k, metadata_filter, dedupe_by_source)
+    chunks = cache.get(collection, version, key)
+    if chunks is not None:
+        logger.info(f"Retrieved chunks={len(chunks)} top_k={top_k} filter={metadata_filter} (cached) query='{query[:60]}'")
+        return chunks
+
+    chunks = _search(store, query, top_k, metadata_filter, dedupe_by_source)
+    cache.put(collection, version, key, chunks)
+    return chunks
 
+
+def _search(store, query: str, top_k: int, metadata_filter: Optional[dict], dedupe_by_source: bool) -> List[Dict[str, Any]]:
     k_fetch = top_k * 6  # fetch extra then dedupe
 
     # Chroma/LangChain versions vary: some use `filter=`, some `where=`.
@@ -46,4 +67,14 @@ def retrieve(store,query: str,top_k: int = 4,metadata_filter: Optional[dict] = N
         f"Retrieved chunks={len(chunks)} top_k={top_k} "
         f"filter={metadata_filter} query='{query[:60]}'"
     )
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+async def aretrieve(store,query: str,top_k: int = 4,metadata_filter: Optional[dict] = None,dedupe_by_source: bool = True) -> List[Dict[str, Any]]:
+    """
+    Async wrapper: Chroma search is blocking, so it runs on the dedicated
+    vector-search executor (with the caller's context, for request stats).
+    """
+    from app.core.resources import run_on_search_executor
+
+    return await run_on_search_executor(retrieve, store, query, top_k, metadata_filter, dedupe_by_source)
@@ -1,40 +1,164 @@
 import logging
-from typing import List, Dict, Any
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
 
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 
-logger = logging.getLogger(__name__)
+from app.core.settings import settings
+from app.ingest.embedder import get_embedder
 
+logger = logging.getLogger(__name__)
 
-def get_vector_store(persist_dir: str):
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
+def get_vector_store(persist_dir: str, collection_name: str = "docs", embedding=None, collection_metadata=None):
+    """
+    Builds a new Chroma handle. Request paths should go through
+    app.core.resources.get_docs_store, which reuses one handle per process.
+    """
     store = Chroma(
-        collection_name="docs",
-        embedding_function=embeddings,
+        collection_name=collection_name,
+        embedding_function=embedding or get_embedder(),
         persist_directory=persist_dir,
+        collection_metadata=collection_metadata,
     )
 
-    logger.info(f"Vector store initialized at {persist_dir}")
+    logger.info(f"Vector store initialized at {persist_dir} collection={collection_name}")
     return store
 
 
+# -------------------------
+# Collection versions
+# -------------------------
+# A counter per (persist_dir, collection), bumped on every write. Kept in
+# SQLite rather than in-process so an ingestion run in another process
+# invalidates caches keyed on it (answer cache, retrieval cache). Reads sit
+# on the /qa hot path, so they use a long-lived per-thread connection and
+# are cached for COLLECTION_VERSION_TTL_MS.
+
+_versions_ready: set = set()
+_versions_lock = threading.Lock()
+_versions_local = threading.local()
+# (db path, persist_dir, collection) -> (version, read at)
+_version_cache: Dict[tuple, Tuple[int, float]] = {}
+
+
+def _init_versions_db(path: str) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        # readers don't block the ingestion writer (or the other way round)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS collection_versions (
+                persist_dir TEXT NOT NULL,
+                collection TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at INTEGER NOT NULL,
+                PRIMARY KEY (persist_dir, collection)
+            )
+            """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _versions_conn() -> sqlite3.Connection:
+    """This thread's connection to the versions db; the schema is created once per process."""
+    path = settings.COLLECTION_VERSIONS_PATH
+    if path not in _versions_ready:
+        with _versions_lock:
+            if path not in _versions_ready:
+                _init_versions_db(path)
+                _versions_ready.add(path)
+
+    conns = getattr(_versions_local, "conns", None)
+    if conns is None:
+        conns = _versions_local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        # timeout = busy wait while another process holds the write lock
+        conn = conns[path] = sqlite3.connect(path, timeout=10)
+    return conn
+
+
+def collection_id(store) -> tuple:
+    return (str(getattr(store, "_persist_directory", "") or ""), store._collection.name)
+
+
+def collection_version(store) -> int:
+    persist_dir, collection = collection_id(store)
+    key = (settings.COLLECTION_VERSIONS_PATH, persist_dir, collection)
+    cached = _version_cache.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[1] < settings.COLLECTION_VERSION_TTL_MS / 1000:
+        return cached[0]
+
+    row = _versions_conn().execute(
+        "SELECT version FROM collection_versions WHERE persist_dir = ? AND collection = ?",
+        (persist_dir, collection),
+    ).fetchone()
+    version = int(row[0]) if row else 0
+    _version_cache[key] = (version, now)
+    return version
+
+
+def bump_collection_version(store) -> int:
+    persist_dir, collection = collection_id(store)
+    conn = _versions_conn()
+    with conn:
+        conn.execute(
+            "INSERT INTO collection_versions(persist_dir, collection, version, updated_at) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT(persist_dir, collection) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+            (persist_dir, collection, int(time.time())),
+        )
+        version = int(
+            conn.execute(
+                "SELECT version FROM collection_versions WHERE persist_dir = ? AND collection = ?",
+                (persist_dir, collection),
+            ).fetchone()[0]
+        )
+    # this process sees its own writes at once, without waiting out the TTL
+    _version_cache[(settings.COLLECTION_VERSIONS_PATH, persist_dir, collection)] = (version, time.monotonic())
+    return version
+
+
+_METADATA_KEYS = ("id", "doc_id", "chunk_id", "chunk_strategy", "source", "ingested_at")
+_OPTIONAL_METADATA_KEYS = ("content_hash", "start_offset", "end_offset", "duplicate_of")
+
+
+def _record_metadata(r: Dict[str, Any]) -> Dict[str, Any]:
+    meta = {k: r[k] for k in _METADATA_KEYS}
+    # Chroma rejects None metadata values
+    meta.update({k: r[k] for k in _OPTIONAL_METADATA_KEYS if r.get(k) is not None})
+    return meta
+
+
 def add_records(store, records: List[Dict[str, Any]]):
     texts = [r["text"] for r in records]
-    metadatas = [
-        {
-            "id": r["id"],
-            "doc_id": r["doc_id"],
-            "chunk_id": r["chunk_id"],
-            "chunk_strategy": r["chunk_strategy"],
-            "source": r["source"],
-            "ingested_at": r["ingested_at"],
-        }
-        for r in records
-    ]
+    metadatas = [_record_metadata(r) for r in records]
     ids = [r["id"] for r in records]
 
-    store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+    if records and all(r.get("vector") is not None for r in records):
+        # Records already carry their embeddings; add_texts would embed them a second time.
+        store._collection.upsert(
+            ids=ids,
+            embeddings=[r["vector"] for r in records],
+            metadatas=metadatas,
+            documents=texts,
+        )
+    else:
+        store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+
+    version = bump_collection_version(store)
+    logger.info(f"Added {len(records)} records to vector store (version={version})")
+
 
-    logger.info(f"Added {len(records)} records to vector store")
\ No newline at end of file
+def delete_records(store, ids: List[str]):
+    if not ids:
+        return
+    store.delete(ids=ids)
+    version = bump_collection_version(store)
+    logger.info(f"Deleted {len(ids)} records from vector store (version={version})")
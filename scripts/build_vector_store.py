@@ -1,15 +1,63 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from app.ingest.pipeline import run_ingestion
-from app.retrieval.vector_store import get_vector_store, add_records
+import argparse
+from app.core.settings import settings
+from app.ingest.journal import IngestJournal
+from app.ingest.pipeline import sync_vector_store
+from app.retrieval.vector_store import get_vector_store
+
+
+def print_progress(progress: dict):
+    eta = f"{progress['eta_s']}s" if progress["eta_s"] is not None else "n/a"
+    print(
+        f"run={progress['run_id']} status={progress['status']} "
+        f"docs={progress['docs_done']}/{progress['docs_total']} ({progress['percent']}%) "
+        f"committed={progress['committed']} unchanged={progress['unchanged']} failed={progress['failed']} "
+        f"batches={progress['batches']} records={progress['records']} "
+        f"docs/s={progress['docs_per_s']} eta={eta}"
+    )
+
 
 if __name__ == "__main__":
-    records = run_ingestion(
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", action="store_true", help="continue the last unfinished run instead of starting over")
+    parser.add_argument("--status", action="store_true", help="print progress of the latest run and exit")
+    parser.add_argument("--max-docs", type=int, default=10, help="0 = full scan (also detects deleted sources)")
+    args = parser.parse_args()
+
+    if args.status:
+        journal = IngestJournal(settings.INGEST_JOURNAL_PATH)
+        run_id = journal.latest_run()
+        if run_id is None:
+            print("no ingestion runs recorded")
+        else:
+            print_progress(journal.progress(run_id))
+        raise SystemExit(0)
+
+    store = get_vector_store("data/vector_store")
+
+    # Incremental: only new/changed docs are embedded (see data/ingest_manifest.sqlite3)
+    summary = sync_vector_store(
         "data/docs/langchain/langchain",
-        max_docs=10,
+        store,
         chunk_strategy="semantic",
+        max_docs=args.max_docs or None,
+        resume=args.resume,
     )
 
-    store = get_vector_store("data/vector_store")
-    add_records(store, records)
\ No newline at end of file
+    print(
+        f"added={summary['added']} changed={summary['changed']} "
+        f"unchanged={summary['unchanged']} resumed={summary['resumed']} deleted={summary['deleted']} "
+        f"failed={summary['failed']} "
+        f"chunks_embedded={summary['chunks_embedded']} chunks_deleted={summary['chunks_deleted']}"
+    )
+    print_progress(summary["progress"])
+    embed = summary["embed"]
+    print(f"embedding: chunks/s={embed['chunks_per_s']} requests/s={embed['requests_per_s']} splits={embed['splits']}")
+    if "dedup" in summary:
+        dedup = summary["dedup"]
+        print(
+            f"dedup: exact={dedup['exact_duplicates']} near={dedup['near_duplicates']} "
+            f"embedding_calls_saved={dedup['embedding_calls_saved']} index_entries_saved={dedup['index_entries_saved']}"
+        )
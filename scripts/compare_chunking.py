@@ -1,13 +1,18 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import argparse
 import time
+from app.ingest.chunker import iter_chunk_spans
+from app.ingest.loader import load_markdown_files
 from app.ingest.pipeline import run_ingestion
 
+DOCS_DIR = "data/docs/langchain/langchain"
+
 
 def run(strategy: str):
     start = time.perf_counter()
-    records = run_ingestion("data/docs/langchain/langchain", max_docs=10, chunk_strategy=strategy)
+    records = run_ingestion(DOCS_DIR, max_docs=10, chunk_strategy=strategy)
     elapsed = time.perf_counter() - start
 
     lengths = [len(r["text"]) for r in records]
@@ -19,6 +24,27 @@ def run(strategy: str):
     print(f"elapsed_sec: {elapsed:.2f}")
 
 
+def bench_workers(strategy: str, max_workers: int, max_docs: int):
+    # Chunking only (no embeddings): docs are read once, then chunked with 1..N processes
+    docs = load_markdown_files(DOCS_DIR, max_files=max_docs)
+
+    print(f"\n--- {strategy.upper()} chunking, {len(docs)} docs ---")
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        chunks = sum(len(spans) for _, spans in iter_chunk_spans(docs, strategy, workers=workers))
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers} chunks={chunks} elapsed_sec={elapsed:.2f} docs/s={len(docs) / elapsed:.1f}")
+
+
 if __name__ == "__main__":
-    run("fixed")
-    run("semantic")
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench-workers", type=int, default=0, help="benchmark chunking with 1..N processes (no embedding calls)")
+    parser.add_argument("--max-docs", type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.bench_workers:
+        bench_workers("fixed", args.bench_workers, args.max_docs)
+        bench_workers("semantic", args.bench_workers, args.max_docs)
+    else:
+        run("fixed")
+        run("semantic")
@@ -0,0 +1,37 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+
+from app.core.settings import settings
+from app.ingest.vector_cache import VectorCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and prune the on-disk chunk embedding cache.")
+    parser.add_argument("--dir", default=settings.VECTOR_CACHE_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats")
+    prune = sub.add_parser("prune")
+    prune.add_argument("--max-mb", type=float, default=None, help="evict least-recently-used entries down to this size")
+    prune.add_argument("--model", default=None, help="drop every entry for this embedding model")
+    args = parser.parse_args()
+
+    if not args.dir:
+        raise SystemExit("VECTOR_CACHE_DIR is not set")
+
+    cache = VectorCache(args.dir)
+    try:
+        if args.cmd == "stats":
+            print(json.dumps(cache.stats(), indent=2))
+        else:
+            max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+            print(json.dumps(cache.prune(max_bytes=max_bytes, model=args.model), indent=2))
+            print(json.dumps(cache.stats(), indent=2))
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+PAYLOADS = {
+    "qa": lambda q, i: {"question": q, "top_k": 4},
+    "qa-agent": lambda q, i: {"question": q, "top_k": 4},
+    "qa-multi": lambda q, i: {"user_id": f"load-{i % 8}", "session_id": f"load-{i}", "question": q, "top_k": 4},
+}
+
+
+def _pct(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def run_level(client: httpx.AsyncClient, url: str, endpoint: str, question: str, concurrency: int, total: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(f"{url}/{endpoint}", json=PAYLOADS[endpoint](question, i))
+                r.raise_for_status()
+                latencies.append((time.perf_counter() - t0) * 1000)
+            except httpx.HTTPError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(
+        f"concurrency={concurrency} requests={total} ok={len(latencies)} errors={errors} "
+        f"elapsed_s={elapsed:.2f} req/s={len(latencies) / elapsed:.1f} "
+        f"p50_ms={_pct(latencies, 50):.0f} p95_ms={_pct(latencies, 95):.0f} p99_ms={_pct(latencies, 99):.0f}"
+    )
+
+
+async def main(args):
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for level in levels:
+            await run_level(client, args.url, args.endpoint, args.question, level, max(args.requests, level))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000/v1")
+    parser.add_argument("--endpoint", choices=sorted(PAYLOADS), default="qa")
+    parser.add_argument("--question", default="How do I add memory to a LangGraph agent?")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=128, help="requests per level (at least the concurrency)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,49 @@
+import asyncio
+
+from app.core.resources import ResourceRegistry
+
+
+class _Handle:
+    def __init__(self, name, opened, on_close=None):
+        self.name = name
+        self.closed = False
+        self.on_close = on_close
+        opened.append(name)
+
+    def close(self):
+        if self.on_close:
+            self.on_close()
+        self.closed = True
+
+
+def _open_store_and_outbox(registry, opened):
+    store = registry.get_or_create("store", lambda: _Handle("store", opened))
+
+    def drain():
+        # like MemoryOutbox.close(): the flush writes through the store
+        assert not registry.get_or_create("store", lambda: _Handle("store", opened)).closed
+
+    outbox = registry.get_or_create("outbox", lambda: _Handle("outbox", opened, on_close=drain))
+    return store, outbox
+
+
+def test_close_all_keeps_older_handles_open_while_closing():
+    registry, opened = ResourceRegistry(), []
+    store, outbox = _open_store_and_outbox(registry, opened)
+
+    registry.close_all()
+
+    assert opened == ["store", "outbox"]
+    assert store.closed and outbox.closed
+    assert registry.stats()["open"] == []
+
+
+def test_aclose_all_keeps_older_handles_open_while_closing():
+    registry, opened = ResourceRegistry(), []
+    store, outbox = _open_store_and_outbox(registry, opened)
+
+    asyncio.run(registry.aclose_all())
+
+    assert opened == ["store", "outbox"]
+    assert store.closed and outbox.closed
+    assert registry.stats()["open"] == []